@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+from gerenciador import GerenciadorColecao
+from search_engine import MotorBusca
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+
+def montar_colecao(caminho, total, gerador):
+    """coleção sintética de `total` documentos distintos, cada um juntando trechos de dois documentos reais"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+
+    gerenciador = GerenciadorColecao()
+    vistos = set()
+    for doc_id in range(total):
+        #cópias exatas empatariam no score e distorceriam o recall; sorteia de novo até sair um conteúdo novo
+        while True:
+            a, b = gerador.choice(docs)["content"].split(), gerador.choice(docs)["content"].split()
+            corte_a, corte_b = gerador.randrange(1, len(a) + 1), gerador.randrange(len(b))
+            conteudo = " ".join(a[:corte_a] + b[corte_b:])
+            if conteudo not in vistos:
+                vistos.add(conteudo)
+                break
+        palavras, offsets = gerenciador.preprocessor.processar_documento_com_offsets(conteudo)
+        gerenciador._indexar_documento(doc_id, f"S{doc_id}", conteudo, palavras, offsets=offsets)
+
+    #o TF-IDF é calculado uma vez só, depois de indexar tudo
+    gerenciador._recalcular_tfidf_completo()
+    return gerenciador, docs
+
+
+def gerar_consultas(docs, quantidade, gerador):
+    """consultas de 2 a 4 palavras tiradas de trechos dos documentos"""
+    consultas = []
+    for _ in range(quantidade):
+        palavras = gerador.choice(docs)["content"].split()
+        tamanho = gerador.randint(2, 4)
+        inicio = gerador.randrange(max(1, len(palavras) - tamanho))
+        consultas.append(" ".join(palavras[inicio:inicio + tamanho]))
+    return consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k e latência da busca por cosseno aproximada")
+    parser.add_argument("--documentos", type=int, default=1000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--colecao", default="colecao - trabalho 01.json")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    gerador = random.Random(args.semente)
+    gerenciador, docs = montar_colecao(args.colecao, args.documentos, gerador)
+    consultas = gerar_consultas(docs, args.consultas, gerador)
+    motor_busca = MotorBusca(gerenciador)
+
+    indice = motor_busca._obter_indice_impacto()
+    print("\n" + "="*78)
+    print(f"BUSCA APROXIMADA | {args.documentos} documentos, {indice.total_postings} postings, "
+          f"{len(consultas)} consultas")
+    print("="*78)
+    print(f"{'Orçamento':<16} {f'Recall@{args.k}':>10} {'c/ empates':>11} {'Exata (ms)':>12} {'Aprox. (ms)':>12} "
+          f"{'Postings':>12}")
+    print("-"*78)
+
+    orcamentos = [
+        ("sem limite", {}),
+        ("1 camada", {"max_camadas": 1}),
+        ("2 camadas", {"max_camadas": 2}),
+        ("2000 postings", {"orcamento_postings": 2000}),
+        ("500 postings", {"orcamento_postings": 500}),
+        ("100 postings", {"orcamento_postings": 100}),
+        ("0,2 ms", {"orcamento_tempo": 0.0002}),
+    ]
+    for nome, orcamento in orcamentos:
+        stats = motor_busca.avaliar_recall(consultas, args.k, **orcamento)
+        print(f"{nome:<16} {stats['recall']:>10.3f} {stats['recall_empates']:>11.3f} {stats['latencia_exata_ms']:>12.3f} "
+              f"{stats['latencia_aproximada_ms']:>12.3f} {stats['postings_por_consulta']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
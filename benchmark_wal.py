@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from gerenciador import GerenciadorColecao
+from wal import LogOperacoes
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+
+def carregar_documentos(caminho, total):
+    """repete a coleção até chegar em `total` documentos, com ids novos"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    return [(i, f"{docs[i % len(docs)]['name']}-{i // len(docs)}", docs[i % len(docs)]["content"])
+            for i in range(total)]
+
+
+def _em_paralelo(funcao, itens, escritores):
+    def executar(parte):
+        for item in parte:
+            funcao(item)
+
+    threads = [threading.Thread(target=executar, args=(itens[i::escritores],)) for i in range(escritores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def ingerir(documentos, remocoes, log=None, escritores=1):
+    """adiciona todos os documentos e depois remove `remocoes` deles, com a mesma carga em todas as variantes
+
+    com mais de um escritor a trava serializa só a alteração do gerenciador e a espera pelo
+    fsync é feita fora dela, como no servidor
+    """
+    gerenciador = GerenciadorColecao(log=log)
+    trava = threading.Lock()
+    removidos = list(range(0, remocoes * 2, 2))
+
+    def alterar(funcao, *args):
+        with log.confirmacao_adiada() if log else contextlib.nullcontext():
+            with trava:
+                funcao(*args)
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if escritores == 1:
+            for doc_id, nome, conteudo in documentos:
+                gerenciador.adicionar_documento(doc_id, nome, conteudo)
+            for doc_id in removidos:
+                gerenciador.remover_documento(doc_id)
+        else:
+            _em_paralelo(lambda doc: alterar(gerenciador.adicionar_documento, *doc), documentos, escritores)
+            _em_paralelo(lambda doc_id: alterar(gerenciador.remover_documento, doc_id), removidos, escritores)
+    if log:
+        log.sincronizar()
+    return time.perf_counter() - inicio
+
+
+def gravar_log(registros, log, escritores=1):
+    """só o caminho do log (registro + confirmação), sem indexar; isola o custo do fsync"""
+    def gravar(registro):
+        log.confirmar(log.registrar_adicao(*registro))
+
+    inicio = time.perf_counter()
+    if escritores == 1:
+        for registro in registros:
+            gravar(registro)
+    else:
+        _em_paralelo(gravar, registros, escritores)
+    log.sincronizar()
+    return time.perf_counter() - inicio
+
+
+def medir(repeticoes, variantes, executar):
+    """mediana de `repeticoes` execuções de cada variante (nome, escritores, opções do log ou None)
+
+    as variantes são intercaladas a cada repetição, para que variações da máquina ao longo do
+    tempo afetem todas igualmente; cada execução usa um diretório de log novo
+    retorna: {nome: (mediana em segundos, diretório da última execução ou None)}
+    """
+    duracoes = {nome: [] for nome, _, _ in variantes}
+    diretorios = {}
+    for _ in range(repeticoes):
+        for nome, escritores, opcoes_log in variantes:
+            log = None
+            if opcoes_log is not None:
+                shutil.rmtree(diretorios.get(nome, ""), ignore_errors=True)
+                diretorios[nome] = tempfile.mkdtemp(prefix="wal_")
+                log = LogOperacoes(diretorios[nome], **opcoes_log)
+            duracoes[nome].append(executar(log, escritores))
+            if log:
+                log.fechar()
+    return {nome: (statistics.median(duracoes[nome]), diretorios.get(nome)) for nome in duracoes}
+
+
+def recuperar(diretorio):
+    log = LogOperacoes(diretorio)
+    gerenciador = GerenciadorColecao(log=log)
+    inicio = time.perf_counter()
+    reaplicados = log.recuperar(gerenciador)
+    duracao = time.perf_counter() - inicio
+    log.fechar()
+    return duracao, reaplicados, len(gerenciador.documentos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo do log de operações na ingestão e tempo de recuperação")
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--remocoes", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções por variante (é mostrada a mediana)")
+    parser.add_argument("--colecao", default="colecao - trabalho 01.json")
+    args = parser.parse_args()
+
+    documentos = carregar_documentos(args.colecao, args.documentos)
+    operacoes = args.documentos + args.remocoes
+
+    #variantes: (nome, escritores, opções do log); todas fazem as mesmas adições e remoções
+    variantes = [
+        ("síncrono", 1, {"checkpoint_a_cada": 0}),
+        ("síncrono, 4 escritores", 4, {"checkpoint_a_cada": 0}),
+        ("síncrono, 16 escritores", 16, {"checkpoint_a_cada": 0}),
+        ("assíncrono, grupo de 16", 1, {"checkpoint_a_cada": 0, "tamanho_grupo": 16, "sincrono": False}),
+        ("assíncrono, grupo de 64", 1, {"checkpoint_a_cada": 0, "tamanho_grupo": 64, "sincrono": False}),
+    ]
+
+    #aquecimento: a primeira ingestão paga importações, caches e alocação
+    ingerir(documentos, args.remocoes)
+
+    #o tempo da ingestão é dominado pelo recálculo do TF-IDF (O(N) por alteração), então o custo
+    #do registro + fsync é medido também isolado, sem indexar
+    print("\n" + "="*72)
+    print(f"SÓ O LOG | {args.documentos} registros, mediana de {args.repeticoes} execuções")
+    print("="*72)
+    gerenciador = GerenciadorColecao()
+    registros = []
+    for doc_id, nome, conteudo in documentos:
+        palavras, offsets = gerenciador.preprocessor.processar_documento_com_offsets(conteudo)
+        registros.append((doc_id, nome, conteudo, palavras, None, offsets))
+    medidas = medir(args.repeticoes, variantes, lambda log, escritores: gravar_log(registros, log, escritores))
+    for nome, (duracao, diretorio) in medidas.items():
+        shutil.rmtree(diretorio, ignore_errors=True)
+        print(f"{nome:<32} {duracao * 1000:10.2f} ms  {duracao / len(registros) * 1e6:10.1f} µs/registro")
+
+    print("\n" + "="*72)
+    print(f"INGESTÃO | {operacoes} operações, mediana de {args.repeticoes} execuções")
+    print("="*72)
+    #checkpoint depois de 3/4 das operações: a recuperação só reaplica o último quarto do log
+    variantes = [("sem log", 1, None)] + variantes + \
+        [("+ checkpoints", 1, {"checkpoint_a_cada": operacoes * 3 // 4})]
+    medidas = medir(args.repeticoes, variantes,
+                    lambda log, escritores: ingerir(documentos, args.remocoes, log, escritores))
+    base = medidas["sem log"][0]
+    for nome, (duracao, _) in medidas.items():
+        linha = f"{nome if nome == 'sem log' else f'log {nome}':<32} {duracao:8.3f} s  {operacoes / duracao:10.1f} ops/s"
+        if nome != "sem log":
+            linha += f"  ({(duracao - base) / base * 100:+.1f}%)"
+        print(linha)
+
+    print("\n" + "="*72)
+    print("RECUPERAÇÃO")
+    print("="*72)
+    print(f"{'reconstrução completa':<32} {base:8.3f} s  (ingestão sem log, para comparação)")
+    for nome, variante in (("só log", "síncrono"), ("checkpoint + final do log", "+ checkpoints")):
+        duracao, reaplicados, total_docs = recuperar(medidas[variante][1])
+        print(f"{nome:<32} {duracao:8.3f} s  ({reaplicados} registros reaplicados, {total_docs} documentos)")
+
+    for _, diretorio in medidas.values():
+        if diretorio:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+from array import array
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+#um container cobre 2^16 ids; acima desse número de elementos o vetor de bits ocupa menos
+#memória que a lista ordenada de 16 bits (8 KB)
+LIMITE_ARRAY = 4096
+BYTES_BITSET = 1 << 13
+
+
+def _bits_do_byte(byte):
+    return tuple(i for i in range(8) if byte >> i & 1)
+
+
+BITS_POR_BYTE = [_bits_do_byte(b) for b in range(256)]
+
+
+def _array_para_bitset(valores):
+    bits = 0
+    for v in valores:
+        bits |= 1 << v
+    return bits
+
+
+def _iterar_bitset(bits):
+    dados = bits.to_bytes(BYTES_BITSET, "little")
+    for i, byte in enumerate(dados):
+        if byte:
+            base = i << 3
+            for bit in BITS_POR_BYTE[byte]:
+                yield base + bit
+
+
+def _bitset_para_array(bits):
+    return array("H", _iterar_bitset(bits))
+
+
+def _normalizar(container):
+    """escolhe a representação mais compacta; devolve None para container vazio"""
+    if isinstance(container, int):
+        total = container.bit_count()
+        if total == 0:
+            return None
+        if total <= LIMITE_ARRAY:
+            return _bitset_para_array(container)
+        return container
+
+    if not container:
+        return None
+    if len(container) > LIMITE_ARRAY:
+        return _array_para_bitset(container)
+    return container
+
+
+def _e(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return _normalizar(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _normalizar(array("H", (v for v in a if b >> v & 1)))
+    return _normalizar(array("H", sorted(set(a).intersection(b))))
+
+
+def _ou(a, b):
+    if isinstance(a, int) or isinstance(b, int) or len(a) + len(b) > LIMITE_ARRAY:
+        bits_a = a if isinstance(a, int) else _array_para_bitset(a)
+        bits_b = b if isinstance(b, int) else _array_para_bitset(b)
+        return _normalizar(bits_a | bits_b)
+    return _normalizar(array("H", sorted(set(a).union(b))))
+
+
+def _e_nao(a, b):
+    if isinstance(a, int):
+        bits_b = b if isinstance(b, int) else _array_para_bitset(b)
+        return _normalizar(a & ~bits_b)
+    if isinstance(b, int):
+        return _normalizar(array("H", (v for v in a if not b >> v & 1)))
+    excluidos = set(b)
+    return _normalizar(array("H", (v for v in a if v not in excluidos)))
+
+
+class BitmapComprimido:
+    """conjunto de ids inteiros não negativos no estilo Roaring
+
+    os ids são divididos pelos 16 bits altos em containers; cada container é uma lista
+    ordenada (array de 16 bits) quando esparso ou um vetor de bits (int do Python) quando
+    denso, e as operações AND/OR/ANDNOT trabalham container a container
+    """
+
+    __slots__ = ("containers",)
+
+    def __init__(self, valores=()):
+        self.containers = {}
+        for valor in valores:
+            self.adicionar(valor)
+
+    @classmethod
+    def _de_containers(cls, containers):
+        bitmap = cls()
+        bitmap.containers = containers
+        return bitmap
+
+    def adicionar(self, valor):
+        if valor < 0:
+            raise ValueError(f"id negativo não suportado: {valor}")
+        alto, baixo = valor >> 16, valor & 0xFFFF
+        container = self.containers.get(alto)
+
+        if container is None:
+            self.containers[alto] = array("H", [baixo])
+        elif isinstance(container, int):
+            self.containers[alto] = container | (1 << baixo)
+        else:
+            #busca binária para manter a lista ordenada
+            inicio, fim = 0, len(container)
+            while inicio < fim:
+                meio = (inicio + fim) // 2
+                if container[meio] < baixo:
+                    inicio = meio + 1
+                else:
+                    fim = meio
+            if inicio < len(container) and container[inicio] == baixo:
+                return
+            container.insert(inicio, baixo)
+            if len(container) > LIMITE_ARRAY:
+                self.containers[alto] = _array_para_bitset(container)
+
+    def remover(self, valor):
+        if valor < 0:
+            return
+        alto, baixo = valor >> 16, valor & 0xFFFF
+        container = self.containers.get(alto)
+        if container is None:
+            return
+
+        if isinstance(container, int):
+            container = _normalizar(container & ~(1 << baixo))
+        else:
+            try:
+                container.remove(baixo)
+            except ValueError:
+                return
+            container = _normalizar(container)
+
+        if container is None:
+            del self.containers[alto]
+        else:
+            self.containers[alto] = container
+
+    def __contains__(self, valor):
+        if valor < 0:
+            return False
+        container = self.containers.get(valor >> 16)
+        if container is None:
+            return False
+        baixo = valor & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> baixo & 1)
+        return baixo in container
+
+    def __len__(self):
+        return sum(c.bit_count() if isinstance(c, int) else len(c) for c in self.containers.values())
+
+    def __bool__(self):
+        return bool(self.containers)
+
+    def __iter__(self):
+        for alto in sorted(self.containers):
+            base = alto << 16
+            container = self.containers[alto]
+            valores = _iterar_bitset(container) if isinstance(container, int) else container
+            for baixo in valores:
+                yield base + baixo
+
+    def __eq__(self, outro):
+        if not isinstance(outro, BitmapComprimido):
+            return NotImplemented
+        return list(self) == list(outro)
+
+    def __repr__(self):
+        return f"BitmapComprimido({list(self)!r})"
+
+    def copiar(self):
+        return self._de_containers({
+            alto: c if isinstance(c, int) else array("H", c) for alto, c in self.containers.items()
+        })
+
+    def __and__(self, outro):
+        menores, maiores = sorted((self.containers, outro.containers), key=len)
+        resultado = {}
+        for alto, container in menores.items():
+            if alto in maiores:
+                combinado = _e(container, maiores[alto])
+                if combinado is not None:
+                    resultado[alto] = combinado
+        return self._de_containers(resultado)
+
+    def __or__(self, outro):
+        resultado = {}
+        for alto in self.containers.keys() | outro.containers.keys():
+            a = self.containers.get(alto)
+            b = outro.containers.get(alto)
+            if a is None:
+                resultado[alto] = b if isinstance(b, int) else array("H", b)
+            elif b is None:
+                resultado[alto] = a if isinstance(a, int) else array("H", a)
+            else:
+                resultado[alto] = _ou(a, b)
+        return self._de_containers(resultado)
+
+    def __sub__(self, outro):
+        resultado = {}
+        for alto, container in self.containers.items():
+            if alto in outro.containers:
+                combinado = _e_nao(container, outro.containers[alto])
+            else:
+                combinado = container if isinstance(container, int) else array("H", container)
+            if combinado is not None:
+                resultado[alto] = combinado
+        return self._de_containers(resultado)
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+CONSULTAS_PADRAO = [
+    "estrutura de dados",
+    "lista encadeada",
+    "tabela hash",
+    "árvore binária de busca",
+    "algoritmo de ordenação",
+    "grafos e caminhos",
+    "recuperação da informação",
+    "índice invertido",
+]
+
+
+class ClienteCarga:
+    """gera carga sobre o servidor de busca e mede vazão (QPS) e latência de cauda"""
+
+    def __init__(self, host="127.0.0.1", porta=8080, rota="/busca/cosseno", consultas=None,
+                 conexoes=16, total=2000, top_k=10):
+        self.host = host
+        self.porta = porta
+        self.rota = rota
+        self.consultas = consultas or CONSULTAS_PADRAO
+        self.conexoes = conexoes
+        self.total = total
+        self.top_k = top_k
+
+        self.latencias = []
+        self.erros = {}
+        self._restantes = total
+
+    async def _enviar(self, reader, writer, consulta):
+        corpo = json.dumps({"consulta": consulta, "top_k": self.top_k}).encode("utf-8")
+        requisicao = (
+            f"POST {self.rota} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.porta}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            "\r\n"
+        ).encode("latin-1") + corpo
+        writer.write(requisicao)
+        await writer.drain()
+
+        cabecalho = await reader.readuntil(b"\r\n\r\n")
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        status = int(linhas[0].split(" ", 2)[1])
+
+        tamanho = 0
+        fechar = False
+        for linha in linhas[1:]:
+            nome, _, valor = linha.partition(":")
+            if nome.strip().lower() == "content-length":
+                tamanho = int(valor)
+            elif nome.strip().lower() == "connection" and valor.strip().lower() == "close":
+                fechar = True
+        await reader.readexactly(tamanho)
+        return status, fechar
+
+    async def _conexao(self):
+        reader, writer = await asyncio.open_connection(self.host, self.porta)
+        try:
+            while self._restantes > 0:
+                self._restantes -= 1
+                consulta = random.choice(self.consultas)
+
+                inicio = time.perf_counter()
+                status, fechar = await self._enviar(reader, writer, consulta)
+                latencia = time.perf_counter() - inicio
+
+                if status == 200:
+                    self.latencias.append(latencia)
+                else:
+                    self.erros[status] = self.erros.get(status, 0) + 1
+
+                if fechar:
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(self.host, self.porta)
+        finally:
+            writer.close()
+
+    async def executar(self):
+        inicio = time.perf_counter()
+        await asyncio.gather(*(self._conexao() for _ in range(self.conexoes)))
+        duracao = time.perf_counter() - inicio
+        return self.resumo(duracao)
+
+    def resumo(self, duracao):
+        latencias = sorted(self.latencias)
+
+        def percentil(p):
+            if not latencias:
+                return 0
+            indice = min(len(latencias) - 1, int(round(p / 100 * (len(latencias) - 1))))
+            return latencias[indice] * 1000
+
+        return {
+            "requisicoes": len(latencias) + sum(self.erros.values()),
+            "sucessos": len(latencias),
+            "erros": self.erros,
+            "duracao_s": duracao,
+            "qps": len(latencias) / duracao if duracao > 0 else 0,
+            "p50_ms": percentil(50),
+            "p95_ms": percentil(95),
+            "p99_ms": percentil(99),
+            "max_ms": latencias[-1] * 1000 if latencias else 0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor de busca")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--rota", default="/busca/cosseno",
+                        choices=["/busca/booleana", "/busca/cosseno", "/busca/frases"])
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--total", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    cliente = ClienteCarga(args.host, args.porta, args.rota, conexoes=args.conexoes,
+                           total=args.total, top_k=args.top_k)
+    stats = asyncio.run(cliente.executar())
+
+    print("\n" + "="*60)
+    print("TESTE DE CARGA")
+    print("="*60)
+    print(f"Requisições:   {stats['requisicoes']} ({stats['sucessos']} com sucesso)")
+    if stats["erros"]:
+        print(f"Erros:         {stats['erros']}")
+    print(f"Duração:       {stats['duracao_s']:.2f} s")
+    print(f"Vazão:         {stats['qps']:.1f} consultas/s")
+    print(f"Latência p50:  {stats['p50_ms']:.2f} ms")
+    print(f"Latência p95:  {stats['p95_ms']:.2f} ms")
+    print(f"Latência p99:  {stats['p99_ms']:.2f} ms")
+    print(f"Latência máx:  {stats['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import random
+import zlib
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+PRIMO = (1 << 61) - 1
+
+
+class IndiceMinHash:
+    """assinaturas MinHash dos documentos com índice LSH por bandas
+
+    a assinatura é calculada sobre os shingles (sequências de `tamanho_shingle` radicais) do
+    documento. Dois documentos viram candidatos quando alguma das `bandas` da assinatura é
+    igual, e são considerados quase duplicatas quando a fração de posições iguais da assinatura
+    (estimativa do Jaccard) chega a `limiar`; o documento entra no grupo do mais parecido deles.
+    Os grupos têm ids próprios, nunca reaproveitados, para que um doc_id removido e depois
+    reutilizado não herde o grupo antigo. As funções de hash vêm de uma semente fixa, então
+    assinaturas salvas continuam válidas entre execuções.
+    """
+
+    def __init__(self, num_permutacoes=64, bandas=16, tamanho_shingle=3, limiar=0.8, semente=1):
+        if num_permutacoes % bandas != 0:
+            raise ValueError("num_permutacoes deve ser múltiplo de bandas")
+        self.num_permutacoes = num_permutacoes
+        self.bandas = bandas
+        self.linhas_por_banda = num_permutacoes // bandas
+        self.tamanho_shingle = tamanho_shingle
+        self.limiar = limiar
+
+        gerador = random.Random(semente)
+        self.permutacoes = [(gerador.randrange(1, PRIMO), gerador.randrange(0, PRIMO))
+                            for _ in range(num_permutacoes)]
+
+        self.assinaturas = {}  #doc_id -> assinatura
+        self.baldes = {}  #(banda, valores da banda) -> set de doc_ids
+        self.grupo_de = {}  #doc_id -> id do seu grupo de quase duplicatas
+        self._proximo_grupo = 0
+
+    def assinatura(self, palavras):
+        if not palavras:
+            return None
+
+        n = min(self.tamanho_shingle, len(palavras))
+        hashes = {zlib.crc32(" ".join(palavras[i:i + n]).encode("utf-8"))
+                  for i in range(len(palavras) - n + 1)}
+
+        return [min((a * h + b) % PRIMO for h in hashes) for a, b in self.permutacoes]
+
+    def _chaves_bandas(self, assinatura):
+        r = self.linhas_por_banda
+        return [(banda, tuple(assinatura[banda * r:(banda + 1) * r])) for banda in range(self.bandas)]
+
+    def similaridade(self, assinatura1, assinatura2):
+        iguais = sum(1 for x, y in zip(assinatura1, assinatura2) if x == y)
+        return iguais / self.num_permutacoes
+
+    def encontrar_duplicatas(self, assinatura):
+        """retorna [(doc_id, similaridade)] dos documentos indexados acima do limiar, do mais parecido ao menos"""
+        if assinatura is None:
+            return []
+
+        candidatos = set()
+        for chave in self._chaves_bandas(assinatura):
+            candidatos.update(self.baldes.get(chave, ()))
+
+        duplicatas = []
+        for doc_id in candidatos:
+            similaridade = self.similaridade(assinatura, self.assinaturas[doc_id])
+            if similaridade >= self.limiar:
+                duplicatas.append((doc_id, similaridade))
+
+        duplicatas.sort(key=lambda x: (-x[1], x[0]))
+        return duplicatas
+
+    def _novo_grupo(self):
+        grupo = self._proximo_grupo
+        self._proximo_grupo += 1
+        return grupo
+
+    def adicionar(self, doc_id, assinatura):
+        if assinatura is None:
+            #documento sem palavras não tem duplicatas, mas precisa de um grupo só seu
+            self.grupo_de[doc_id] = self._novo_grupo()
+            return
+
+        duplicatas = self.encontrar_duplicatas(assinatura)
+        self.grupo_de[doc_id] = self.grupo_de[duplicatas[0][0]] if duplicatas else self._novo_grupo()
+
+        self.assinaturas[doc_id] = assinatura
+        for chave in self._chaves_bandas(assinatura):
+            self.baldes.setdefault(chave, set()).add(doc_id)
+
+    def remover(self, doc_id):
+        #os outros membros continuam com o mesmo id de grupo, que não volta a ser usado
+        assinatura = self.assinaturas.pop(doc_id, None)
+        self.grupo_de.pop(doc_id, None)
+        if assinatura is None:
+            return
+
+        for chave in self._chaves_bandas(assinatura):
+            balde = self.baldes.get(chave)
+            if balde is not None:
+                balde.discard(doc_id)
+                if not balde:
+                    del self.baldes[chave]
+
+    def grupo(self, doc_id):
+        #documento fora do índice fica num grupo só dele, distinto dos ids numéricos
+        return self.grupo_de.get(doc_id, ("documento", doc_id))
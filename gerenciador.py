@@ -1,6 +1,13 @@
+import csv
+import heapq
 import json
 import math
+from array import array
 from collections import defaultdict
+from itertools import islice
+from bitmap import BitmapComprimido
+from deduplicacao import IndiceMinHash
+from indice_ngramas import IndiceTrigramas
 from preprocessor import Preprocessor
 
 # Ana Alice Cordeiro - 12211BCC028;
@@ -9,15 +16,26 @@ from preprocessor import Preprocessor
 # Fernanda Ferreira - 12211BCC043;
 # João Vitor Feijó - 12311BCC061
 
+POLITICAS_DUPLICATAS = ("manter", "ignorar")
+
 class GerenciadorColecao:
-    def __init__(self):
+    def __init__(self, log=None, politica_duplicatas="manter"):
+        if politica_duplicatas not in POLITICAS_DUPLICATAS:
+            raise ValueError(f"Política de duplicatas desconhecida: {politica_duplicatas}")
         self.preprocessor = Preprocessor()
+        self.log = log  #LogOperacoes opcional, para recuperar as alterações após uma falha
+        self.versao = 0  #muda a cada alteração da coleção, para invalidar estruturas derivadas
         self.documentos = {}  
         self.vocabulario = set()  
         self.matriz_tfidf = {} 
         self.indice_invertido = {} 
         self.frequencias_doc = {}  
         self.doc_frequencias = {} 
+        self.indice_ngramas = IndiceTrigramas()
+        self.bitmaps_termos = {}  #palavra -> BitmapComprimido com os ids dos documentos
+        #quase duplicatas: "manter" indexa e só agrupa, "ignorar" não indexa o documento
+        self.indice_minhash = IndiceMinHash()
+        self.politica_duplicatas = politica_duplicatas
     
     def carregar_json(self, caminho_arquivo):
         try:
@@ -29,27 +47,91 @@ class GerenciadorColecao:
             return []
     
     def adicionar_documento(self, doc_id, nome, conteudo):
-        palavras_processadas = self.preprocessor.processar_documento(conteudo)
+        #os bitmaps de documentos só aceitam ids inteiros não negativos; valida antes de alterar qualquer estrutura
+        if not isinstance(doc_id, int) or isinstance(doc_id, bool) or doc_id < 0:
+            raise ValueError(f"doc_id deve ser um inteiro não negativo: {doc_id!r}")
+        
+        palavras_processadas, offsets = self.preprocessor.processar_documento_com_offsets(conteudo)
+        assinatura = self.indice_minhash.assinatura(palavras_processadas)
+        
+        if self.politica_duplicatas == "ignorar":
+            duplicatas = self.indice_minhash.encontrar_duplicatas(assinatura)
+            if duplicatas:
+                print(f"Documento {doc_id} ignorado: quase duplicata do documento {duplicatas[0][0]}")
+                return False
+        
+        if self.log:
+            lsn = self.log.registrar_adicao(doc_id, nome, conteudo, palavras_processadas, assinatura, offsets)
+        
+        self._indexar_documento(doc_id, nome, conteudo, palavras_processadas, assinatura, offsets)
+        self._recalcular_tfidf_completo()
+        
+        if self.log:
+            #só retorna depois do registro estar no disco (no modo síncrono do log)
+            self.log.confirmar(lsn)
+            if self.log.precisa_checkpoint():
+                self.log.checkpoint(self)
+        
+        return True
     
+    def _indexar_documento(self, doc_id, nome, conteudo, palavras_processadas, assinatura=None, offsets=None):
+        """insere um documento já processado nas estruturas, sem recalcular o TF-IDF"""
+        self.versao += 1
+        if assinatura is None:
+            assinatura = self.indice_minhash.assinatura(palavras_processadas)
+        self.indice_minhash.adicionar(doc_id, assinatura)
+        
+        if offsets is None or len(offsets) != 2 * len(palavras_processadas):
+            _, offsets = self.preprocessor.processar_documento_com_offsets(conteudo)
+        
         self.documentos[doc_id] = {
             "name": nome,
             "content": conteudo,
-            "palavras": palavras_processadas
+            "palavras": palavras_processadas,
+            #inicio/fim em caracteres de cada posição do índice invertido, intercalados
+            "offsets": array('I', offsets)
         }
     
         self._atualizar_vocabulario(doc_id, palavras_processadas)
         self._atualizar_frequencias(doc_id, palavras_processadas)
         self._atualizar_indice_invertido(doc_id, palavras_processadas)
-        self._recalcular_tfidf_completo()
     
     def remover_documento(self, doc_id):
         if doc_id not in self.documentos:
             print(f"Documento {doc_id} não encontrado")
             return False
         
+        if self.log:
+            lsn = self.log.registrar_remocao(doc_id)
+        
+        self._desindexar_documento(doc_id)
+        self._recalcular_tfidf_completo()
+        
+        if self.log:
+            self.log.confirmar(lsn)
+            if self.log.precisa_checkpoint():
+                self.log.checkpoint(self)
+        
+        print(f"Documento {doc_id} removido com sucesso")
+        return True
+    
+    def _desindexar_documento(self, doc_id):
+        """retira um documento de todas as estruturas, sem recalcular o TF-IDF"""
+        self.versao += 1
+        self.indice_minhash.remover(doc_id)
         palavras = self.documentos[doc_id]["palavras"]
         
         for palavra in set(palavras):
+            if palavra in self.doc_frequencias:
+                self.doc_frequencias[palavra] -= 1
+                if self.doc_frequencias[palavra] <= 0:
+                    del self.doc_frequencias[palavra]
+            
+            if palavra in self.bitmaps_termos:
+                self.bitmaps_termos[palavra].remover(doc_id)
+                if not self.bitmaps_termos[palavra]:
+                    del self.bitmaps_termos[palavra]
+            
             if palavra in self.indice_invertido:
                 if doc_id in self.indice_invertido[palavra]:
                     del self.indice_invertido[palavra][doc_id]
@@ -57,20 +139,39 @@ class GerenciadorColecao:
                 if not self.indice_invertido[palavra]:
                     del self.indice_invertido[palavra]
                     self.vocabulario.discard(palavra)
+                    self.indice_ngramas.remover(palavra)
         
         del self.documentos[doc_id]
         if doc_id in self.matriz_tfidf:
             del self.matriz_tfidf[doc_id]
         if doc_id in self.frequencias_doc:
             del self.frequencias_doc[doc_id]
-        
-        self._recalcular_tfidf_completo()
-        
-        print(f"Documento {doc_id} removido com sucesso")
-        return True
+    
+    def _estado_documento(self, doc_id):
+        """dados de um documento gravados no checkpoint, já processados (palavras, assinatura MinHash e offsets)"""
+        doc = self.documentos[doc_id]
+        return {
+            "doc_id": doc_id,
+            "nome": doc["name"],
+            "conteudo": doc["content"],
+            "palavras": doc["palavras"],
+            "assinatura": self.indice_minhash.assinaturas.get(doc_id),
+            "offsets": doc["offsets"].tolist()
+        }
+    
+    def _restaurar_documento(self, estado):
+        #assinatura salva com outros parâmetros de MinHash é recalculada
+        assinatura = estado.get("assinatura")
+        if assinatura is not None and len(assinatura) != self.indice_minhash.num_permutacoes:
+            assinatura = None
+        self._indexar_documento(estado["doc_id"], estado["nome"], estado["conteudo"], estado["palavras"],
+                                assinatura, estado.get("offsets"))
     
     def _atualizar_vocabulario(self, doc_id, palavras_processadas):
-        self.vocabulario.update(palavras_processadas)
+        for palavra in set(palavras_processadas):
+            if palavra not in self.vocabulario:
+                self.vocabulario.add(palavra)
+                self.indice_ngramas.adicionar(palavra)
     
     def _atualizar_frequencias(self, doc_id, palavras_processadas):
         freq = defaultdict(int)
@@ -94,6 +195,10 @@ class GerenciadorColecao:
             if palavra not in self.indice_invertido:
                 self.indice_invertido[palavra] = {}
             self.indice_invertido[palavra][doc_id] = posicoes
+            
+            if palavra not in self.bitmaps_termos:
+                self.bitmaps_termos[palavra] = BitmapComprimido()
+            self.bitmaps_termos[palavra].adicionar(doc_id)
     
     def _atualizar_tfidf(self, doc_id):
         self.matriz_tfidf[doc_id] = {}
@@ -106,7 +211,7 @@ class GerenciadorColecao:
             tf = freq / total_palavras
             
             num_docs_com_palavra = self.doc_frequencias.get(palavra, 1)
-            total_docs = len(self.documentos)
+            total_docs = self.total_documentos()
             idf = math.log(total_docs / num_docs_com_palavra) if num_docs_com_palavra > 0 else 0
             
             tfidf = tf * idf
@@ -118,34 +223,135 @@ class GerenciadorColecao:
         for doc_id in self.documentos:
             self._atualizar_tfidf(doc_id)
     
+    def total_documentos(self):
+        """número de documentos usado no cálculo do idf"""
+        return len(self.documentos)
+    
     def obter_vocabulario_ordenado(self):
         #ordena vocabulario
         return sorted(list(self.vocabulario))
     
-    def obter_matriz_tfidf_tabular(self):
+    def iterar_vocabulario(self, inicio=0, limite=None):
+        """gera as palavras do vocabulário em ordem alfabética, apenas da página pedida"""
+        if limite is None:
+            palavras = sorted(self.vocabulario)
+        else:
+            #so mantem em memória as palavras até o fim da página
+            palavras = heapq.nsmallest(inicio + limite, self.vocabulario)
+        return islice(palavras, inicio, None)
+    
+    def iterar_matriz_tfidf(self, inicio=0, limite=None):
+        """gera (doc_id, palavra, valor) apenas para as entradas não nulas da matriz TF-IDF"""
+        entradas = self._gerar_entradas_tfidf()
+        fim = inicio + limite if limite is not None else None
+        return islice(entradas, inicio, fim)
+    
+    def _gerar_entradas_tfidf(self):
+        for doc_id in sorted(self.matriz_tfidf.keys()):
+            vetor = self.matriz_tfidf[doc_id]
+            for palavra in sorted(vetor.keys()):
+                valor = vetor[palavra]
+                if valor != 0:
+                    yield doc_id, palavra, valor
+    
+    def iterar_indice_invertido(self, inicio=0, limite=None):
+        """gera (palavra, [(doc_id, posicoes), ...]) em ordem alfabética, apenas da página pedida"""
+        if limite is None:
+            palavras = sorted(self.indice_invertido.keys())
+        else:
+            palavras = heapq.nsmallest(inicio + limite, self.indice_invertido.keys())
+        
+        for palavra in islice(palavras, inicio, None):
+            docs = self.indice_invertido[palavra]
+            yield palavra, [(doc_id, docs[doc_id]) for doc_id in sorted(docs.keys())]
+    
+    def exportar_matriz_tfidf(self, caminho_arquivo, formato="csv"):
+        """exporta as entradas não nulas da matriz TF-IDF em csv, jsonl ou mtx (Matrix Market)
+        retorna: número de entradas escritas
+        """
+        if formato not in ("csv", "jsonl", "mtx"):
+            print(f"Formato de exportação desconhecido: {formato}")
+            return 0
+        
+        try:
+            with open(caminho_arquivo, 'w', encoding='utf-8', newline='') as f:
+                if formato == "csv":
+                    escritor = csv.writer(f)
+                    escritor.writerow(["doc_id", "palavra", "tfidf"])
+                    total = 0
+                    for doc_id, palavra, valor in self.iterar_matriz_tfidf():
+                        escritor.writerow([doc_id, palavra, repr(valor)])
+                        total += 1
+                elif formato == "jsonl":
+                    total = 0
+                    for doc_id, palavra, valor in self.iterar_matriz_tfidf():
+                        f.write(json.dumps({"doc_id": doc_id, "palavra": palavra, "tfidf": valor},
+                                           ensure_ascii=False) + "\n")
+                        total += 1
+                else:
+                    total = self._escrever_matrix_market(f, caminho_arquivo)
+            return total
+        except Exception as e:
+            print(f"Erro ao exportar matriz TF-IDF: {e}")
+            return 0
+    
+    def _escrever_matrix_market(self, f, caminho_arquivo):
+        #linhas = documentos em ordem de id, colunas = vocabulário em ordem alfabética (1-indexados)
+        docs = sorted(self.matriz_tfidf.keys())
         vocab = self.obter_vocabulario_ordenado()
+        coluna_por_palavra = {palavra: j for j, palavra in enumerate(vocab, 1)}
+        nao_nulos = sum(1 for vetor in self.matriz_tfidf.values() for valor in vetor.values() if valor != 0)
         
-        dados = {}
-        for doc_id in sorted(self.documentos.keys()):
-            dados[doc_id] = {}
+        f.write("%%MatrixMarket matrix coordinate real general\n")
+        f.write("% linhas: documentos (ver .docs), colunas: palavras (ver .vocab)\n")
+        f.write(f"{len(docs)} {len(vocab)} {nao_nulos}\n")
+        
+        total = 0
+        for i, doc_id in enumerate(docs, 1):
+            vetor = self.matriz_tfidf[doc_id]
+            for palavra in sorted(vetor.keys()):
+                valor = vetor[palavra]
+                if valor != 0:
+                    f.write(f"{i} {coluna_por_palavra[palavra]} {valor!r}\n")
+                    total += 1
+        
+        #rótulos das linhas e colunas em arquivos auxiliares
+        with open(caminho_arquivo + ".docs", 'w', encoding='utf-8') as f_docs:
+            for doc_id in docs:
+                f_docs.write(f"{doc_id}\n")
+        with open(caminho_arquivo + ".vocab", 'w', encoding='utf-8') as f_vocab:
             for palavra in vocab:
-                valor = self.matriz_tfidf.get(doc_id, {}).get(palavra, 0)
-                dados[doc_id][palavra] = valor
+                f_vocab.write(f"{palavra}\n")
         
-        return dados, vocab
+        return total
     
-    def obter_indice_invertido_formatado(self):
-        resultado = {}
+    def exportar_indice_invertido(self, caminho_arquivo, formato="csv"):
+        """exporta o índice invertido (uma linha por par palavra/documento) em csv ou jsonl
+        retorna: número de entradas escritas
+        """
+        if formato not in ("csv", "jsonl"):
+            print(f"Formato de exportação desconhecido: {formato}")
+            return 0
         
-        for palavra in sorted(self.indice_invertido.keys()):
-            docs = self.indice_invertido[palavra]
-            resultado[palavra] = {}
-            
-            for doc_id in sorted(docs.keys()):
-                posicoes = docs[doc_id]
-                resultado[palavra][doc_id] = posicoes
-        
-        return resultado
+        try:
+            with open(caminho_arquivo, 'w', encoding='utf-8', newline='') as f:
+                escritor = csv.writer(f) if formato == "csv" else None
+                if escritor:
+                    escritor.writerow(["palavra", "doc_id", "posicoes"])
+                
+                total = 0
+                for palavra, docs in self.iterar_indice_invertido():
+                    for doc_id, posicoes in docs:
+                        if escritor:
+                            escritor.writerow([palavra, doc_id, " ".join(map(str, posicoes))])
+                        else:
+                            f.write(json.dumps({"palavra": palavra, "doc_id": doc_id, "posicoes": posicoes},
+                                               ensure_ascii=False) + "\n")
+                        total += 1
+            return total
+        except Exception as e:
+            print(f"Erro ao exportar índice invertido: {e}")
+            return 0
     
     def obter_estatisticas(self):
         total_docs = len(self.documentos)
@@ -0,0 +1,121 @@
+import heapq
+import math
+import time
+from array import array
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+
+class IndiceImpacto:
+    """postings ordenados por impacto, para a busca por cosseno aproximada
+
+    o impacto de uma palavra num documento é o peso TF-IDF já dividido pela norma do documento,
+    quantizado em `niveis` valores inteiros. Os postings de cada palavra ficam agrupados em
+    segmentos de mesmo impacto (do maior para o menor), e os segmentos são divididos em
+    `camadas` faixas de impacto.
+    """
+
+    def __init__(self, matriz_tfidf, niveis=256, camadas=3):
+        self.niveis = niveis
+        self.num_camadas = camadas
+        self.segmentos = {}  #palavra -> [(impacto, array de doc_ids), ...] em ordem decrescente
+        self.camadas = {}  #palavra -> índice do primeiro segmento de cada camada
+        self.escala = 0
+        self.total_postings = 0
+        self._construir(matriz_tfidf)
+
+    def _construir(self, matriz_tfidf):
+        pesos_por_palavra = {}
+        maior = 0
+        for doc_id, vetor in matriz_tfidf.items():
+            norma = math.sqrt(sum(v ** 2 for v in vetor.values()))
+            if norma == 0:
+                continue
+            for palavra, peso in vetor.items():
+                if peso <= 0:
+                    continue
+                peso_normalizado = peso / norma
+                pesos_por_palavra.setdefault(palavra, []).append((doc_id, peso_normalizado))
+                if peso_normalizado > maior:
+                    maior = peso_normalizado
+
+        if maior == 0:
+            return
+        self.escala = maior / (self.niveis - 1)
+
+        for palavra, postings in pesos_por_palavra.items():
+            por_impacto = {}
+            for doc_id, peso in postings:
+                impacto = max(1, round(peso / self.escala))
+                por_impacto.setdefault(impacto, []).append(doc_id)
+
+            segmentos = [(impacto, array("l", sorted(por_impacto[impacto])))
+                         for impacto in sorted(por_impacto, reverse=True)]
+            self.segmentos[palavra] = segmentos
+            self.total_postings += len(postings)
+
+            #camada = faixa de impacto; a primeira guarda os maiores impactos
+            inicio_camadas = []
+            faixa_anterior = None
+            for i, (impacto, _) in enumerate(segmentos):
+                faixa = (self.niveis - 1 - impacto) * self.num_camadas // self.niveis
+                if faixa != faixa_anterior:
+                    inicio_camadas.append(i)
+                    faixa_anterior = faixa
+            self.camadas[palavra] = inicio_camadas
+
+    def buscar(self, vetor_consulta, top_k=10, orcamento_postings=None, orcamento_tempo=None, max_camadas=None):
+        """busca score-at-a-time: processa os segmentos de todas as palavras da consulta em ordem
+        decrescente de contribuição e para ao esgotar o orçamento de postings, de tempo (segundos)
+        ou de camadas
+        retorna: (lista de (doc_id, score), postings processados)
+        """
+        norma_consulta = math.sqrt(sum(v ** 2 for v in vetor_consulta.values()))
+        if norma_consulta == 0 or not self.escala:
+            return [], 0
+
+        fila = []
+        for palavra, peso in vetor_consulta.items():
+            if peso <= 0 or palavra not in self.segmentos:
+                continue
+            peso_consulta = peso / norma_consulta
+            fim = len(self.segmentos[palavra])
+            if max_camadas is not None and max_camadas < len(self.camadas[palavra]):
+                fim = self.camadas[palavra][max_camadas]
+            if fim == 0:
+                #max_camadas=0 não deixa ler nenhum segmento
+                continue
+            impacto = self.segmentos[palavra][0][0]
+            heapq.heappush(fila, (-peso_consulta * impacto, palavra, 0, peso_consulta, fim))
+
+        prazo = time.perf_counter() + orcamento_tempo if orcamento_tempo is not None else None
+        acumuladores = {}
+        processados = 0
+
+        while fila:
+            if orcamento_postings is not None and processados >= orcamento_postings:
+                break
+            if prazo is not None and time.perf_counter() >= prazo:
+                break
+
+            contribuicao, palavra, i, peso_consulta, fim = heapq.heappop(fila)
+            contribuicao = -contribuicao * self.escala
+            _, docs = self.segmentos[palavra][i]
+            if orcamento_postings is not None and len(docs) > orcamento_postings - processados:
+                #o último segmento é lido só até completar o orçamento
+                docs = docs[:orcamento_postings - processados]
+            for doc_id in docs:
+                acumuladores[doc_id] = acumuladores.get(doc_id, 0) + contribuicao
+            processados += len(docs)
+
+            if i + 1 < fim:
+                impacto = self.segmentos[palavra][i + 1][0]
+                heapq.heappush(fila, (-peso_consulta * impacto, palavra, i + 1, peso_consulta, fim))
+
+        melhores = heapq.nlargest(top_k, acumuladores.items(), key=lambda x: x[1]) if top_k \
+            else sorted(acumuladores.items(), key=lambda x: x[1], reverse=True)
+        return melhores, processados
@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+
+def distancia_edicao(a, b, limite):
+    """distância de Levenshtein entre a e b, ou limite + 1 se passar do limite"""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        menor = i
+        for j, cb in enumerate(b, 1):
+            custo = 0 if ca == cb else 1
+            valor = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            atual.append(valor)
+            if valor < menor:
+                menor = valor
+        #nenhuma célula da linha ficou dentro do limite, não tem como melhorar
+        if menor > limite:
+            return limite + 1
+        anterior = atual
+
+    return anterior[-1]
+
+
+class IndiceTrigramas:
+    """índice de trigramas de caracteres sobre o vocabulário, para achar termos parecidos
+
+    cada termo é envolvido em '$' e quebrado em trigramas; a busca só verifica a distância de
+    edição dos termos que compartilham trigramas suficientes com a consulta
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.termos_por_ngrama = defaultdict(set)
+        self.termos = set()
+
+    def _ngramas(self, termo):
+        termo = "$" * (self.n - 1) + termo + "$" * (self.n - 1)
+        return {termo[i:i + self.n] for i in range(len(termo) - self.n + 1)}
+
+    def adicionar(self, termo):
+        if termo in self.termos:
+            return
+        self.termos.add(termo)
+        for ngrama in self._ngramas(termo):
+            self.termos_por_ngrama[ngrama].add(termo)
+
+    def remover(self, termo):
+        if termo not in self.termos:
+            return
+        self.termos.discard(termo)
+        for ngrama in self._ngramas(termo):
+            termos = self.termos_por_ngrama.get(ngrama)
+            if termos is not None:
+                termos.discard(termo)
+                if not termos:
+                    del self.termos_por_ngrama[ngrama]
+
+    def buscar(self, termo, distancia_maxima=2, limite=5):
+        """retorna até `limite` pares (termo, distancia) do vocabulário a no máximo
+        `distancia_maxima` edições de `termo`, ordenados por distância
+        """
+        ngramas = self._ngramas(termo)
+
+        contagem = defaultdict(int)
+        for ngrama in ngramas:
+            for candidato in self.termos_por_ngrama.get(ngrama, ()):
+                contagem[candidato] += 1
+
+        #cada edição destrói no máximo n trigramas (filtro de q-gramas)
+        minimo_comum = max(1, len(ngramas) - self.n * distancia_maxima)
+
+        encontrados = []
+        for candidato, comuns in contagem.items():
+            if comuns < minimo_comum or abs(len(candidato) - len(termo)) > distancia_maxima:
+                continue
+            distancia = distancia_edicao(termo, candidato, distancia_maxima)
+            if distancia <= distancia_maxima:
+                encontrados.append((distancia, -comuns, candidato))
+
+        encontrados.sort()
+        return [(candidato, distancia) for distancia, _, candidato in encontrados[:limite]]
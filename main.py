@@ -41,6 +41,7 @@ class MenuPrincipal:
             print("9.  Realizar busca por similaridade (cosseno)")
             print("10. Realizar busca por frases")
             print("11. Exibir estatísticas")
+            print("12. Exportar matriz TF-IDF / índice invertido")
             print("0.  Sair")
             print("-"*60)
             
@@ -68,6 +69,8 @@ class MenuPrincipal:
                 self.busca_frases()
             elif opcao == "11":
                 self.exibir_estatisticas()
+            elif opcao == "12":
+                self.exportar_dados()
             elif opcao == "0":
                 print("\nEncerrando o sistema...")
                 break
@@ -163,62 +166,89 @@ class MenuPrincipal:
             print("Nenhum documento na coleção!")
             return
         
-        dados, vocab = self.gerenciador.obter_matriz_tfidf_tabular()
+        total_palavras = len(self.gerenciador.vocabulario)
+        palavras_exibir = list(self.gerenciador.iterar_vocabulario(0, 10))
+        matriz = self.gerenciador.matriz_tfidf
         
         print("\n" + "="*80)
         print("MATRIZ TF-IDF")
         print("="*80)
-        print(f"Documentos: {len(dados)} | Palavras: {len(vocab)}\n")
-        
-        palavras_exibir = vocab[:10]
+        print(f"Documentos: {len(self.gerenciador.documentos)} | Palavras: {total_palavras}\n")
         
         print(f"{'Documento':<12}", end="")
         for palavra in palavras_exibir:
             print(f"{palavra:>12}", end="")
-        if len(vocab) > 10:
+        if total_palavras > 10:
             print(f"{'...':<12}", end="")
         print()
-        print("-" * (12 + 12 * len(palavras_exibir) + (12 if len(vocab) > 10 else 0)))
+        print("-" * (12 + 12 * len(palavras_exibir) + (12 if total_palavras > 10 else 0)))
         
-        for doc_id in sorted(dados.keys()):
+        for doc_id in sorted(self.gerenciador.documentos.keys()):
             print(f"D{doc_id:<10}", end="")
+            vetor = matriz.get(doc_id, {})
             for palavra in palavras_exibir:
-                valor = dados[doc_id][palavra]
+                valor = vetor.get(palavra, 0)
                 print(f"{valor:>12.4f}", end="")
-            if len(vocab) > 10:
+            if total_palavras > 10:
                 print(f"{'...':<12}", end="")
             print()
         
-        if len(vocab) > 10:
-            print(f"\n[Mostrando primeiras {len(palavras_exibir)} de {len(vocab)} palavras]")
+        if total_palavras > 10:
+            print(f"\n[Mostrando primeiras {len(palavras_exibir)} de {total_palavras} palavras]")
     
     def exibir_indice_invertido(self):
         #indice invertido
-        indice = self.gerenciador.obter_indice_invertido_formatado()
+        total_palavras = len(self.gerenciador.indice_invertido)
         
-        if not indice:
+        if not total_palavras:
             print("Índice invertido vazio!")
             return
         
         print("\n" + "="*60)
         print("ÍNDICE INVERTIDO")
         print("="*60)
-        print(f"Total de palavras: {len(indice)}\n")
+        print(f"Total de palavras: {total_palavras}\n")
         
-        limite = min(20, len(indice))
-        palavras = list(indice.keys())[:limite]
+        limite = min(20, total_palavras)
         
-        for palavra in palavras:
-            docs = indice[palavra]
-            docs_info = []
-            for doc_id in sorted(docs.keys()):
-                posicoes = docs[doc_id]
-                docs_info.append(f"D{doc_id}:{posicoes}")
-            
+        for palavra, docs in self.gerenciador.iterar_indice_invertido(0, limite):
+            docs_info = [f"D{doc_id}:{posicoes}" for doc_id, posicoes in docs]
             print(f"{palavra:>15} → {', '.join(docs_info)}")
         
-        if len(indice) > limite:
-            print(f"\n[Mostrando {limite} de {len(indice)} palavras. Use uma palavra específica para detalhes]")
+        if total_palavras > limite:
+            print(f"\n[Mostrando {limite} de {total_palavras} palavras. Use uma palavra específica para detalhes]")
+    
+    def exportar_dados(self):
+        if not self.gerenciador.documentos:
+            print("Nenhum documento na coleção!")
+            return
+        
+        print("\n" + "="*60)
+        print("EXPORTAR DADOS")
+        print("="*60)
+        print("1. Matriz TF-IDF (csv, jsonl ou mtx)")
+        print("2. Índice invertido (csv ou jsonl)")
+        
+        escolha = input("\nO que exportar? ").strip()
+        if escolha not in ("1", "2"):
+            print("❌ Opção inválida!")
+            return
+        
+        formato = input("Formato (Enter para csv): ").strip().lower() or "csv"
+        caminho = input("Arquivo de saída: ").strip()
+        if not caminho:
+            return
+        
+        if escolha == "1":
+            total = self.gerenciador.exportar_matriz_tfidf(caminho, formato)
+        else:
+            total = self.gerenciador.exportar_indice_invertido(caminho, formato)
+        
+        print(f"✓ {total} entradas exportadas para {caminho}")
+    
+    def perguntar_tolerancia(self):
+        resposta = input("Tolerar erros de digitação? (s/n): ").strip().lower()
+        return resposta == 's'
     
     def busca_booleana(self):
         print("\n" + "="*60)
@@ -231,7 +261,8 @@ class MenuPrincipal:
         if not consulta:
             return
         
-        resultados = self.motor_busca.busca_booleana(consulta)
+        tolerante = self.perguntar_tolerancia()
+        resultados = self.motor_busca.busca_booleana(consulta, tolerante)
         
         print(f"\n{'RESULTADOS':^60}")
         print("-"*60)
@@ -240,10 +271,10 @@ class MenuPrincipal:
             print("Nenhum resultado encontrado!")
         else:
             print(f"✓ {len(resultados)} documento(s) encontrado(s):\n")
+            termos = self.motor_busca.termos_da_consulta(consulta, booleana=True, tolerante=tolerante)
             for i, (doc_id, nome) in enumerate(resultados, 1):
-                conteudo = self.gerenciador.documentos[doc_id]['content'][:60]
                 print(f"{i}. [{nome}]")
-                print(f"   {conteudo}...")
+                print(f"   {self.motor_busca.gerar_trecho(doc_id, termos)}")
     
     def busca_similaridade(self):
         print("\n" + "="*60)
@@ -261,7 +292,18 @@ class MenuPrincipal:
         except ValueError:
             top_k = None
         
-        resultados = self.motor_busca.busca_similaridade_cosseno(consulta, top_k)
+        tolerante = self.perguntar_tolerancia()
+        aproximada = input("Busca aproximada (postings por impacto)? (s/n): ").strip().lower() == 's'
+        if aproximada:
+            try:
+                orcamento = input("Máximo de postings lidos (Enter para sem limite): ").strip()
+                orcamento = int(orcamento) if orcamento else None
+            except ValueError:
+                orcamento = None
+            resultados = self.motor_busca.busca_similaridade_aproximada(consulta, top_k, orcamento_postings=orcamento,
+                                                                        tolerante=tolerante)
+        else:
+            resultados = self.motor_busca.busca_similaridade_cosseno(consulta, top_k, tolerante)
         
         print(f"\n{'RESULTADOS':^60}")
         print("-"*60)
@@ -270,12 +312,13 @@ class MenuPrincipal:
             print("Nenhum resultado encontrado!")
         else:
             print(f"✓ {len(resultados)} documento(s) encontrado(s):\n")
-            print(f"{'Rank':<5} {'Nome':<10} {'Similaridade':<15} {'Conteúdo'}")
+            print(f"{'Rank':<5} {'Nome':<10} {'Similaridade':<15}")
             print("-"*60)
             
+            termos = self.motor_busca.termos_da_consulta(consulta, tolerante=tolerante)
             for i, (doc_id, nome, score) in enumerate(resultados, 1):
-                conteudo = self.gerenciador.documentos[doc_id]['content'][:30]
-                print(f"{i:<5} {nome:<10} {score:<15.4f} {conteudo}...")
+                print(f"{i:<5} {nome:<10} {score:<15.4f}")
+                print(f"      {self.motor_busca.gerar_trecho(doc_id, termos)}")
     
     def busca_frases(self):
         """Realiza uma busca por frases"""
@@ -294,7 +337,8 @@ class MenuPrincipal:
         except ValueError:
             top_k = None
         
-        resultados = self.motor_busca.busca_por_frases(consulta, top_k)
+        tolerante = self.perguntar_tolerancia()
+        resultados = self.motor_busca.busca_por_frases(consulta, top_k, tolerante)
         
         print(f"\n{'RESULTADOS':^60}")
         print("-"*60)
@@ -303,12 +347,13 @@ class MenuPrincipal:
             print("Nenhum resultado encontrado!")
         else:
             print(f"✓ {len(resultados)} documento(s) encontrado(s):\n")
-            print(f"{'Rank':<5} {'Nome':<10} {'Ocorrências':<15} {'Conteúdo'}")
+            print(f"{'Rank':<5} {'Nome':<10} {'Ocorrências':<15}")
             print("-"*60)
             
+            termos = self.motor_busca.termos_da_consulta(consulta, tolerante=tolerante)
             for i, (doc_id, nome, score) in enumerate(resultados, 1):
-                conteudo = self.gerenciador.documentos[doc_id]['content'][:30]
-                print(f"{i:<5} {nome:<10} {score:<15d} {conteudo}...")
+                print(f"{i:<5} {nome:<10} {score:<15d}")
+                print(f"      {self.motor_busca.gerar_trecho(doc_id, termos)}")
     
     def exibir_estatisticas(self):
         stats = self.gerenciador.obter_estatisticas()
@@ -58,18 +58,43 @@ class Preprocessor:
         
         return palavras
     
-    def obter_posicoes_palavras(self, texto):
-       
-        texto_limpo = self.limpar_texto(texto)
-        palavras = self.tokenizar(texto_limpo)
+    def processar_documento_com_offsets(self, texto):
+        """processa o texto como processar_documento e devolve também, para cada palavra
+        processada, o intervalo de caracteres (inicio, fim) dela no texto original
+        retorna: (palavras, offsets) com offsets = [inicio0, fim0, inicio1, fim1, ...]
+        """
+        palavras = []
+        offsets = []
         
-        posicoes = {}
-        for i, palavra in enumerate(palavras):
-            if palavra in self.stop_words:
+        #cada sequência sem espaços vira no máximo um token, como em limpar_texto + tokenizar
+        for trecho in re.finditer(r'\S+', texto):
+            bruto = trecho.group()
+            minusculo = bruto.lower()
+            token = self.remover_pontuacao(minusculo)
+            if not token or token in self.stop_words:
+                continue
+            
+            radical = self.stemmer.stem(token)
+            if not radical:
                 continue
-          
-            palavra_radical = self.stemmer.stem(palavra)
             
+            inicio, fim = trecho.start(), trecho.end()
+            #ajusta o intervalo às letras, sem a pontuação em volta
+            if len(minusculo) == len(bruto):
+                letras = [m.start() for m in re.finditer(r'[a-zà-úÀ-Ú]', minusculo)]
+                inicio, fim = trecho.start() + letras[0], trecho.start() + letras[-1] + 1
+            
+            palavras.append(radical)
+            offsets.extend((inicio, fim))
+        
+        return palavras, offsets
+    
+    def obter_posicoes_palavras(self, texto):
+        #mesmas posições do índice invertido (contadas depois de remover as stopwords)
+        palavras, _ = self.processar_documento_com_offsets(texto)
+        
+        posicoes = {}
+        for i, palavra_radical in enumerate(palavras):
             if palavra_radical not in posicoes:
                 posicoes[palavra_radical] = []
             posicoes[palavra_radical].append(i)
@@ -1,4 +1,9 @@
+import heapq
 import math
+import re
+import time
+from bitmap import BitmapComprimido
+from indice_impacto import IndiceImpacto
 from preprocessor import Preprocessor
 
 # Ana Alice Cordeiro - 12211BCC028;
@@ -9,13 +14,170 @@ from preprocessor import Preprocessor
 class MotorBusca:
     """implementa os diferentes tipos de busca"""
     
-    def __init__(self, gerenciador):
+    def __init__(self, gerenciador, distancia_maxima=2, max_expansoes=3):
         self.gerenciador = gerenciador
         self.preprocessor = Preprocessor()
+        #parâmetros da busca tolerante a erros de digitação
+        self.distancia_maxima = distancia_maxima
+        self.max_expansoes = max_expansoes
+        #índice por impacto da busca aproximada, montado sob demanda
+        self._indice_impacto = None
+        self._versao_impacto = None
+    
+    #expansão de termos com erro de digitação
+    
+    def expandir_termo(self, termo):
+        """retorna os termos do vocabulário que substituem `termo` na consulta:
+        o próprio termo se ele está no índice, senão até max_expansoes termos parecidos
+        """
+        if termo in self.gerenciador.indice_invertido:
+            return [termo]
+        
+        #radicais curtos toleram só uma edição, senão quase tudo vira candidato
+        distancia = 1 if len(termo) <= 4 else self.distancia_maxima
+        parecidos = self.gerenciador.indice_ngramas.buscar(termo, distancia, self.max_expansoes)
+        return [candidato for candidato, _ in parecidos]
+    
+    def _expandir_consulta(self, palavras):
+        #termos do vocabulário ficam como estão (repetições incluídas), só os desconhecidos são trocados
+        expandidas = []
+        for palavra in palavras:
+            if palavra in self.gerenciador.indice_invertido:
+                expandidas.append(palavra)
+            else:
+                expandidas.extend(self.expandir_termo(palavra))
+        return expandidas
+    
+    #trechos dos resultados
+    
+    def termos_da_consulta(self, consulta, booleana=False, tolerante=False):
+        """palavras processadas da consulta que devem ser destacadas nos trechos
+        (na consulta booleana, ignora os operadores e os termos negados)
+        """
+        if booleana:
+            tokens = consulta.split()
+            textos = []
+            for i, token in enumerate(tokens):
+                if token.upper() in ('AND', 'OR', 'NOT'):
+                    continue
+                if i > 0 and tokens[i - 1].upper() == 'NOT':
+                    continue
+                textos.append(token)
+            consulta = " ".join(textos)
+        
+        palavras = self.preprocessor.processar_documento(consulta)
+        if tolerante:
+            palavras = self._expandir_consulta(palavras)
+        return palavras
+    
+    def gerar_trecho(self, doc_id, palavras_consulta, janela=12, margem=40, marcadores=("[", "]")):
+        """trecho do documento em volta da janela de `janela` palavras com mais ocorrências
+        da consulta, com as ocorrências destacadas; usa as posições do índice invertido e os
+        offsets guardados, então o custo depende do número de ocorrências e não do tamanho do documento
+        """
+        doc = self.gerenciador.documentos[doc_id]
+        conteudo = doc["content"]
+        offsets = doc["offsets"]
+        
+        listas = []
+        for termo in set(palavras_consulta):
+            posicoes = self.gerenciador.indice_invertido.get(termo, {}).get(doc_id)
+            if posicoes:
+                listas.append([(posicao, termo) for posicao in posicoes])
+        
+        if not listas:
+            trecho = conteudo[:2 * margem]
+            return self._normalizar_espacos(trecho) + ("..." if len(conteudo) > len(trecho) else "")
+        
+        ocorrencias = list(heapq.merge(*listas))
+        
+        #janela deslizante: maximiza termos distintos e depois o total de ocorrências
+        contagem = {}
+        melhor = None
+        intervalo = (0, 0)
+        inicio = 0
+        for fim, (posicao, termo) in enumerate(ocorrencias):
+            contagem[termo] = contagem.get(termo, 0) + 1
+            while posicao - ocorrencias[inicio][0] >= janela:
+                termo_saida = ocorrencias[inicio][1]
+                contagem[termo_saida] -= 1
+                if contagem[termo_saida] == 0:
+                    del contagem[termo_saida]
+                inicio += 1
+            #em caso de empate fica a janela que começa antes
+            candidato = (len(contagem), fim - inicio + 1)
+            if melhor is None or candidato > melhor:
+                melhor = candidato
+                intervalo = (inicio, fim)
+        
+        escolhidas = ocorrencias[intervalo[0]:intervalo[1] + 1]
+        
+        #estende a janela até `margem` caracteres de cada lado, sem cortar palavras
+        char_inicio = offsets[2 * escolhidas[0][0]]
+        char_fim = offsets[2 * escolhidas[-1][0] + 1]
+        corte_inicio = max(0, char_inicio - margem)
+        #qualquer espaço em branco separa palavras (quebras de linha e tabulações também)
+        if corte_inicio > 0:
+            espaco = re.compile(r'\s').search(conteudo, corte_inicio, char_inicio)
+            corte_inicio = espaco.end() if espaco else char_inicio
+        corte_fim = min(len(conteudo), char_fim + margem)
+        if corte_fim < len(conteudo):
+            espaco = corte_fim - 1
+            while espaco >= char_fim and not conteudo[espaco].isspace():
+                espaco -= 1
+            corte_fim = espaco if espaco >= char_fim else char_fim
+        
+        abre, fecha = marcadores
+        partes = []
+        cursor = corte_inicio
+        for posicao, _ in escolhidas:
+            inicio_palavra, fim_palavra = offsets[2 * posicao], offsets[2 * posicao + 1]
+            partes.append(conteudo[cursor:inicio_palavra])
+            partes.append(abre + conteudo[inicio_palavra:fim_palavra] + fecha)
+            cursor = fim_palavra
+        partes.append(conteudo[cursor:corte_fim])
+        
+        trecho = self._normalizar_espacos("".join(partes))
+        if corte_inicio > 0:
+            trecho = "..." + trecho
+        if corte_fim < len(conteudo):
+            trecho = trecho + "..."
+        return trecho
+    
+    def _normalizar_espacos(self, texto):
+        return re.sub(r'\s+', ' ', texto).strip()
+    
+    #quase duplicatas nos resultados
+    
+    def colapsar_duplicatas(self, resultados):
+        """mantém só o resultado mais bem colocado de cada grupo de quase duplicatas"""
+        grupos_vistos = set()
+        colapsados = []
+        for resultado in resultados:
+            grupo = self.gerenciador.indice_minhash.grupo(resultado[0])
+            if grupo not in grupos_vistos:
+                grupos_vistos.add(grupo)
+                colapsados.append(resultado)
+        return colapsados
+    
+    def agrupar_duplicatas(self, resultados):
+        """junta os resultados do mesmo grupo de quase duplicatas
+        retorna: lista de (resultado mais bem colocado, [doc_ids das duplicatas encontradas])
+        """
+        por_grupo = {}
+        agrupados = []
+        for resultado in resultados:
+            grupo = self.gerenciador.indice_minhash.grupo(resultado[0])
+            if grupo in por_grupo:
+                por_grupo[grupo][1].append(resultado[0])
+            else:
+                por_grupo[grupo] = (resultado, [])
+                agrupados.append(por_grupo[grupo])
+        return agrupados
     
     #busca booleana
     
-    def busca_booleana(self, consulta):
+    def busca_booleana(self, consulta, tolerante=False):
         
         #faz busca booleana usando operadores AND, OR, NOT utilizadno a matriz TF-IDF
         #processa a consulta
@@ -24,7 +186,7 @@ class MotorBusca:
         if not tokens:
             return []
 
-        resultado = self._processar_token_booleano(tokens[0])
+        resultado = self._processar_token_booleano(tokens[0], tolerante)
 
         i = 1
         while i < len(tokens):
@@ -38,48 +200,56 @@ class MotorBusca:
                 break
             
             proximo_termo = tokens[i + 1]
-            proximo_resultado = self._processar_token_booleano(proximo_termo)
+            proximo_resultado = self._processar_token_booleano(proximo_termo, tolerante)
             
             if operador == 'AND':
-                resultado = resultado.intersection(proximo_resultado)
+                resultado = resultado & proximo_resultado
             elif operador == 'OR':
-                resultado = resultado.union(proximo_resultado)
+                resultado = resultado | proximo_resultado
             elif operador == 'NOT':
                 resultado = resultado - proximo_resultado
             
             i += 2
         
-        #devolve documentos encontrados
+        #devolve documentos encontrados (o bitmap já itera em ordem)
         docs_encontrados = []
-        for doc_id in sorted(resultado):
+        for doc_id in resultado:
             if doc_id in self.gerenciador.documentos:
                 docs_encontrados.append((doc_id, self.gerenciador.documentos[doc_id]["name"]))
         
         return docs_encontrados
     
-    def _processar_token_booleano(self, termo):
-        """processa um termo e retorna o conjunto de documentos que o contêm"""
+    def _processar_token_booleano(self, termo, tolerante=False):
+        """processa um termo e retorna o bitmap dos documentos que o contêm"""
         #processa o termo
         termo_processado = self.preprocessor.processar_documento(termo)
         
         if not termo_processado:
-            return set()
+            return BitmapComprimido()
         
         termo = termo_processado[0]
+        termos = self.expandir_termo(termo) if tolerante else [termo]
         
-        #busca no indice invertodo
-        if termo in self.gerenciador.indice_invertido:
-            return set(self.gerenciador.indice_invertido[termo].keys())
-        
-        return set()
+        return self._bitmap_do_grupo(termos)
+    
+    def _bitmap_do_grupo(self, termos):
+        """união dos bitmaps de documentos dos termos"""
+        docs = BitmapComprimido()
+        for termo in termos:
+            bitmap = self.gerenciador.bitmaps_termos.get(termo)
+            if bitmap is not None:
+                docs = docs | bitmap if docs else bitmap
+        return docs
     
     #busca por similaridade (cosseno)
     
-    def busca_similaridade_cosseno(self, consulta, top_k=None):
+    def busca_similaridade_cosseno(self, consulta, top_k=None, tolerante=False):
         """executa busca por similaridade de cosseno, calcula a similaridade entre o vetor de consulta e os documentos
         retorna: lista de (doc_id, nome_doc, similaridade) ordenada por score
         """
         palavras_consulta = self.preprocessor.processar_documento(consulta)
+        if tolerante:
+            palavras_consulta = self._expandir_consulta(palavras_consulta)
         
         if not palavras_consulta:
             return []
@@ -112,6 +282,88 @@ class MotorBusca:
         
         return similaridades
     
+    #busca por similaridade aproximada (postings ordenados por impacto)
+    
+    def _obter_indice_impacto(self):
+        #qualquer adição/remoção muda o idf e a norma de todos os documentos, então o índice não tem
+        #como ser atualizado por partes: ele é refeito inteiro (O(postings)) na primeira busca
+        #aproximada depois de uma alteração, custo da mesma ordem do recálculo do TF-IDF
+        if self._indice_impacto is None or self._versao_impacto != self.gerenciador.versao:
+            self._indice_impacto = IndiceImpacto(self.gerenciador.matriz_tfidf)
+            self._versao_impacto = self.gerenciador.versao
+        return self._indice_impacto
+    
+    def busca_similaridade_aproximada(self, consulta, top_k=10, orcamento_postings=None,
+                                      orcamento_tempo=None, max_camadas=None, tolerante=False):
+        """busca por cosseno que lê os postings do maior para o menor impacto e para ao esgotar
+        o orçamento de postings, de tempo (segundos) ou de camadas; sem orçamento o ranking só
+        difere do exato pela quantização dos pesos
+        retorna: lista de (doc_id, nome_doc, similaridade) ordenada por score
+        """
+        palavras_consulta = self.preprocessor.processar_documento(consulta)
+        if tolerante:
+            palavras_consulta = self._expandir_consulta(palavras_consulta)
+        
+        if not palavras_consulta:
+            return []
+        
+        vetor_consulta = self._calcular_vetor_consulta(palavras_consulta)
+        melhores, _ = self._obter_indice_impacto().buscar(
+            vetor_consulta, top_k, orcamento_postings, orcamento_tempo, max_camadas)
+        
+        return [(doc_id, self.gerenciador.documentos[doc_id]["name"], score) for doc_id, score in melhores]
+    
+    def avaliar_recall(self, consultas, k=10, **orcamento):
+        """compara a busca aproximada com o cosseno exato nas consultas dadas; o recall com empates
+        também conta como acerto um documento com o mesmo score exato do k-ésimo
+        retorna: recall@k médio (estrito e com empates), latências médias (ms) e postings lidos por consulta
+        """
+        indice = self._obter_indice_impacto()
+        soma_recall = 0
+        soma_recall_empates = 0
+        avaliadas = 0
+        tempo_exato = 0
+        tempo_aproximado = 0
+        postings = 0
+        
+        for consulta in consultas:
+            palavras_consulta = self.preprocessor.processar_documento(consulta)
+            if not palavras_consulta:
+                continue
+            vetor_consulta = self._calcular_vetor_consulta(palavras_consulta)
+            
+            inicio = time.perf_counter()
+            scores = {}
+            for doc_id in self.gerenciador.documentos:
+                similaridade = self._similaridade_cosseno(vetor_consulta, self.gerenciador.matriz_tfidf.get(doc_id, {}))
+                if similaridade > 0:
+                    scores[doc_id] = similaridade
+            exatos = heapq.nsmallest(k, scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+            tempo_exato += time.perf_counter() - inicio
+            
+            inicio = time.perf_counter()
+            aproximados, lidos = indice.buscar(vetor_consulta, k, **orcamento)
+            tempo_aproximado += time.perf_counter() - inicio
+            postings += lidos
+            
+            if not exatos:
+                continue
+            encontrados = set(doc_id for doc_id, _ in aproximados)
+            soma_recall += len(encontrados.intersection(exatos)) / len(exatos)
+            corte = scores[exatos[-1]] - 1e-12
+            soma_recall_empates += sum(1 for doc_id in encontrados if scores.get(doc_id, 0) >= corte) / len(exatos)
+            avaliadas += 1
+        
+        total = len(consultas) or 1
+        return {
+            "recall": soma_recall / avaliadas if avaliadas else 0,
+            "recall_empates": soma_recall_empates / avaliadas if avaliadas else 0,
+            "consultas_avaliadas": avaliadas,
+            "latencia_exata_ms": tempo_exato / total * 1000,
+            "latencia_aproximada_ms": tempo_aproximado / total * 1000,
+            "postings_por_consulta": postings / total
+        }
+    
     def _calcular_vetor_consulta(self, palavras_consulta):
         """calcula o vetor TF-IDF para a consulta"""
         vetor = {}
@@ -128,7 +380,7 @@ class MotorBusca:
         
             tf = freq / total_palavras #tf   
             num_docs = self.gerenciador.doc_frequencias.get(palavra, 1) #idf
-            total_docs = len(self.gerenciador.documentos) if self.gerenciador.documentos else 1
+            total_docs = self.gerenciador.total_documentos() or 1
             idf = math.log(total_docs / num_docs) if num_docs > 0 else 0
             
             vetor[palavra] = tf * idf
@@ -154,7 +406,8 @@ class MotorBusca:
         return produto / (norma1 * norma2)
     
     def _calcular_relevancia_termos(self, palavras_consulta, doc_id):
-        doc_palavras = self.gerenciador.documentos[doc_id]["palavras"]
+        #as frequências do documento servem de conjunto de termos (consulta O(1))
+        doc_palavras = self.gerenciador.frequencias_doc.get(doc_id, {})
         
         #conta quantas palavras da consulta aparecem no documento
         termos_comuns = len([p for p in palavras_consulta if p in doc_palavras])
@@ -163,16 +416,17 @@ class MotorBusca:
         return 0
     
     def _busca_por_ocorrencia_palavras(self, palavras_consulta, top_k=None):
-        resultados = []
+        #percorre só os documentos de cada termo da consulta, não a coleção inteira
+        ocorrencias = {}
+        for p in palavras_consulta:
+            for doc_id in self.gerenciador.bitmaps_termos.get(p, ()):
+                ocorrencias[doc_id] = ocorrencias.get(doc_id, 0) + 1
         
-        for doc_id in self.gerenciador.documentos:
-            doc_palavras = self.gerenciador.documentos[doc_id]["palavras"]
-            ocorrencias = sum(1 for p in palavras_consulta if p in doc_palavras)
-            
-            if ocorrencias > 0:
-                nome_doc = self.gerenciador.documentos[doc_id]["name"]
-                relevancia = ocorrencias / len(palavras_consulta) if palavras_consulta else 0
-                resultados.append((doc_id, nome_doc, relevancia))
+        resultados = []
+        for doc_id in sorted(ocorrencias):
+            nome_doc = self.gerenciador.documentos[doc_id]["name"]
+            relevancia = ocorrencias[doc_id] / len(palavras_consulta)
+            resultados.append((doc_id, nome_doc, relevancia))
         
         resultados.sort(key=lambda x: x[2], reverse=True)
         
@@ -183,21 +437,27 @@ class MotorBusca:
     
     #busca por frase
     
-    def busca_por_frases(self, frase, top_k=None):
+    def busca_por_frases(self, frase, top_k=None, tolerante=False):
         #busca por uma frase completa usando o índice invertido
         palavras_frase = self.preprocessor.processar_documento(frase)
         
         if not palavras_frase:
             return []
         
-        if len(palavras_frase) == 1:
-            return self._busca_palavra_simples(palavras_frase[0], top_k)
+        #cada posição da frase aceita o termo ou, na busca tolerante, suas expansões
+        if tolerante:
+            grupos = [self.expandir_termo(p) for p in palavras_frase]
+        else:
+            grupos = [[p] for p in palavras_frase]
+        
+        if len(grupos) == 1:
+            return self._busca_palavra_simples(grupos[0], top_k)
         
         resultados = []
-        docs_candidatos = self._encontrar_docs_com_todas_palavras(palavras_frase)
+        docs_candidatos = self._encontrar_docs_com_todas_palavras(grupos)
         
         for doc_id in docs_candidatos:
-            ocorrencias = self._encontrar_frases_no_doc(doc_id, palavras_frase)
+            ocorrencias = self._encontrar_frases_no_doc(doc_id, grupos)
             
             if ocorrencias:
                 nome_doc = self.gerenciador.documentos[doc_id]["name"]
@@ -211,16 +471,18 @@ class MotorBusca:
         
         return resultados
     
-    def _busca_palavra_simples(self, palavra, top_k=None):
-        resultados = []
+    def _busca_palavra_simples(self, termos, top_k=None):
+        scores = {}
         
-        if palavra in self.gerenciador.indice_invertido:
-            docs = self.gerenciador.indice_invertido[palavra]
-            
+        for palavra in termos:
+            docs = self.gerenciador.indice_invertido.get(palavra, {})
             for doc_id in docs:
-                nome_doc = self.gerenciador.documentos[doc_id]["name"]
-                score = len(docs[doc_id])  # Frequência da palavra
-                resultados.append((doc_id, nome_doc, score))
+                scores[doc_id] = scores.get(doc_id, 0) + len(docs[doc_id])  # Frequência da palavra
+        
+        resultados = []
+        for doc_id, score in scores.items():
+            nome_doc = self.gerenciador.documentos[doc_id]["name"]
+            resultados.append((doc_id, nome_doc, score))
         
         resultados.sort(key=lambda x: x[2], reverse=True)
         
@@ -229,29 +491,25 @@ class MotorBusca:
         
         return resultados
     
-    def _encontrar_docs_com_todas_palavras(self, palavras):
+    def _encontrar_docs_com_todas_palavras(self, grupos):
 
         #começa com documentos da primeira palavra
-        if palavras[0] not in self.gerenciador.indice_invertido:
-            return set()
-        
-        docs = set(self.gerenciador.indice_invertido[palavras[0]].keys())
-        for palavra in palavras[1:]:
-            if palavra not in self.gerenciador.indice_invertido:
-                return set()
-            docs = docs.intersection(self.gerenciador.indice_invertido[palavra].keys())
+        docs = self._bitmap_do_grupo(grupos[0])
+        for termos in grupos[1:]:
+            if not docs:
+                break
+            docs = docs & self._bitmap_do_grupo(termos)
         
         return docs
     
-    def _encontrar_frases_no_doc(self, doc_id, palavras_frase):
+    def _encontrar_frases_no_doc(self, doc_id, grupos):
     
         posicoes_por_palavra = []
         
-        for palavra in palavras_frase:
-            if palavra not in self.gerenciador.indice_invertido:
-                return []
-            
-            posicoes = self.gerenciador.indice_invertido[palavra].get(doc_id, [])
+        for termos in grupos:
+            posicoes = set()
+            for palavra in termos:
+                posicoes.update(self.gerenciador.indice_invertido.get(palavra, {}).get(doc_id, []))
             if not posicoes:
                 return []
             
@@ -259,7 +517,7 @@ class MotorBusca:
         
         ocorrencias = []
         
-        for pos_primeira in posicoes_por_palavra[0]:
+        for pos_primeira in sorted(posicoes_por_palavra[0]):
             
             encontrada = True
             
@@ -273,4 +531,4 @@ class MotorBusca:
             if encontrada:
                 ocorrencias.append(pos_primeira)
         
-        return ocorrencias
\ No newline at end of file
+        return ocorrencias
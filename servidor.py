@@ -0,0 +1,472 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from gerenciador import GerenciadorColecao
+from search_engine import MotorBusca
+from wal import LogOperacoes
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+STATUS_HTTP = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+
+class _TravaLeituraEscrita:
+    """várias buscas podem ler o índice ao mesmo tempo, mas adições e remoções são exclusivas"""
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._leitores = 0
+        self._escrevendo = False
+
+    def adquirir_leitura(self):
+        with self._condicao:
+            while self._escrevendo:
+                self._condicao.wait()
+            self._leitores += 1
+
+    def liberar_leitura(self):
+        with self._condicao:
+            self._leitores -= 1
+            if self._leitores == 0:
+                self._condicao.notify_all()
+
+    def adquirir_escrita(self):
+        with self._condicao:
+            while self._escrevendo:
+                self._condicao.wait()
+            self._escrevendo = True
+            while self._leitores > 0:
+                self._condicao.wait()
+
+    def liberar_escrita(self):
+        with self._condicao:
+            self._escrevendo = False
+            self._condicao.notify_all()
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ServidorBusca:
+    """serviço JSON sobre HTTP na frente do MotorBusca
+
+    as consultas entram numa fila limitada (quando cheia, responde 503) e são agrupadas em
+    lotes executados no pool de workers, para não bloquear o loop de eventos
+    """
+
+    def __init__(self, gerenciador, motor_busca, host="127.0.0.1", porta=8080,
+                 workers=4, tamanho_fila=256, tamanho_lote=16, espera_lote=0.002, tempo_leitura=10.0):
+        self.gerenciador = gerenciador
+        self.motor_busca = motor_busca
+        self.host = host
+        self.porta = porta
+        self.workers = workers
+        self.tamanho_fila = tamanho_fila
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        #cliente que não termina de mandar a requisição nesse tempo tem a conexão fechada
+        self.tempo_leitura = tempo_leitura
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.trava = _TravaLeituraEscrita()
+        self.fila = None
+        self.servidor = None
+        self._despachantes = []
+
+        self.rotas_busca = {
+            "/busca/booleana": self._executar_booleana,
+            "/busca/cosseno": self._executar_cosseno,
+            "/busca/frases": self._executar_frases,
+        }
+
+    #ciclo de vida
+
+    async def iniciar(self):
+        self.fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._despachantes = [asyncio.create_task(self._despachar_lotes()) for _ in range(self.workers)]
+        self.servidor = await asyncio.start_server(self._tratar_conexao, self.host, self.porta)
+        #porta 0 escolhe uma porta livre
+        self.porta = self.servidor.sockets[0].getsockname()[1]
+
+    async def parar(self):
+        if self.servidor:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        for tarefa in self._despachantes:
+            tarefa.cancel()
+        await asyncio.gather(*self._despachantes, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        if self.gerenciador.log:
+            self.gerenciador.log.fechar()
+
+    async def servir_para_sempre(self):
+        await self.iniciar()
+        print(f"✓ Servidor ouvindo em http://{self.host}:{self.porta}")
+        try:
+            await self.servidor.serve_forever()
+        finally:
+            await self.parar()
+
+    #protocolo HTTP
+
+    async def _tratar_conexao(self, reader, writer):
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(reader)
+                except ErroHTTP as e:
+                    await self._responder(writer, e.status, {"erro": e.mensagem}, manter_conexao=False)
+                    break
+
+                if requisicao is None:
+                    break
+
+                metodo, caminho, cabecalhos, corpo = requisicao
+                manter_conexao = cabecalhos.get("connection", "").lower() != "close"
+
+                try:
+                    resposta = await self._rotear(metodo, caminho, corpo)
+                    status = 200
+                except ErroHTTP as e:
+                    status, resposta = e.status, {"erro": e.mensagem}
+                except Exception as e:
+                    status, resposta = 500, {"erro": str(e)}
+
+                await self._responder(writer, status, resposta, manter_conexao)
+                if not manter_conexao:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _ler_requisicao(self, reader):
+        try:
+            cabecalho = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.tempo_leitura)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            #conexão ociosa ou cabeçalho que não chega: fecha a conexão
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErroHTTP(413, "cabeçalho muito grande")
+
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        try:
+            metodo, caminho, _ = linhas[0].split(" ", 2)
+        except ValueError:
+            raise ErroHTTP(400, "linha de requisição inválida")
+
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ":" in linha:
+                nome, valor = linha.split(":", 1)
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+        try:
+            tamanho = int(cabecalhos.get("content-length", 0))
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho < 0:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroHTTP(413, "corpo muito grande")
+
+        try:
+            corpo = await asyncio.wait_for(reader.readexactly(tamanho), self.tempo_leitura) if tamanho else b""
+        except asyncio.TimeoutError:
+            raise ErroHTTP(408, "corpo da requisição incompleto")
+        return metodo.upper(), caminho, cabecalhos, corpo
+
+    async def _responder(self, writer, status, dados, manter_conexao=True):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        cabecalho = (
+            f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n"
+        )
+        if status == 503:
+            cabecalho += "Retry-After: 1\r\n"
+        writer.write((cabecalho + "\r\n").encode("latin-1") + corpo)
+        await writer.drain()
+
+    def _ler_json(self, corpo):
+        if not corpo:
+            return {}
+        try:
+            dados = json.loads(corpo.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErroHTTP(400, "corpo JSON inválido")
+        if not isinstance(dados, dict):
+            raise ErroHTTP(400, "o corpo deve ser um objeto JSON")
+        return dados
+
+    async def _rotear(self, metodo, caminho, corpo):
+        caminho = caminho.split("?", 1)[0].rstrip("/") or "/"
+
+        if caminho in self.rotas_busca:
+            if metodo != "POST":
+                raise ErroHTTP(405, "use POST")
+            return await self._enfileirar_busca(caminho, self._ler_json(corpo))
+
+        if caminho == "/documentos" and metodo == "POST":
+            dados = self._ler_json(corpo)
+            if "doc_id" not in dados or "conteudo" not in dados:
+                raise ErroHTTP(400, "campos obrigatórios: doc_id, conteudo")
+            if not isinstance(dados["conteudo"], str):
+                raise ErroHTTP(400, "conteudo deve ser uma string")
+            if not isinstance(dados.get("nome", ""), str):
+                raise ErroHTTP(400, "nome deve ser uma string")
+            return await self._executar_escrita(self._adicionar_documento, dados)
+
+        if caminho.startswith("/documentos/"):
+            if metodo != "DELETE":
+                raise ErroHTTP(405, "use DELETE")
+            try:
+                doc_id = int(caminho.rsplit("/", 1)[1])
+            except ValueError:
+                raise ErroHTTP(400, "id de documento inválido")
+            return await self._executar_escrita(self._remover_documento, doc_id)
+
+        if caminho == "/estatisticas" and metodo == "GET":
+            return await self._executar_leitura(lambda _: self.gerenciador.obter_estatisticas(), None)
+
+        raise ErroHTTP(404, "rota não encontrada")
+
+    #fila, lotes e backpressure
+
+    async def _enfileirar_busca(self, caminho, dados):
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self.fila.put_nowait((self.rotas_busca[caminho], dados, futuro))
+        except asyncio.QueueFull:
+            raise ErroHTTP(503, "servidor sobrecarregado, tente novamente")
+        return await futuro
+
+    async def _despachar_lotes(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.fila.get()]
+
+            #espera um pouco para juntar mais consultas no mesmo lote
+            prazo = loop.time() + self.espera_lote
+            while len(lote) < self.tamanho_lote:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                resultados = await loop.run_in_executor(self.executor, self._executar_lote, lote)
+            except Exception as e:
+                resultados = [e] * len(lote)
+
+            for (_, _, futuro), resultado in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+    def _executar_lote(self, lote):
+        """roda no pool de workers: executa todas as consultas do lote sob a mesma trava de leitura"""
+        resultados = []
+        self.trava.adquirir_leitura()
+        try:
+            for funcao, dados, _ in lote:
+                try:
+                    resultados.append(funcao(dados))
+                except ErroHTTP as e:
+                    resultados.append(e)
+                except Exception as e:
+                    resultados.append(ErroHTTP(500, str(e)))
+        finally:
+            self.trava.liberar_leitura()
+        return resultados
+
+    async def _executar_leitura(self, funcao, dados):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._com_trava_leitura, funcao, dados)
+
+    def _com_trava_leitura(self, funcao, dados):
+        self.trava.adquirir_leitura()
+        try:
+            return funcao(dados)
+        finally:
+            self.trava.liberar_leitura()
+
+    async def _executar_escrita(self, funcao, dados):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._com_trava_escrita, funcao, dados)
+
+    def _com_trava_escrita(self, funcao, dados):
+        log = self.gerenciador.log
+        #a espera pelo fsync acontece depois de soltar a trava, então escritores
+        #concorrentes entram no mesmo grupo do log e respondem só depois de gravados
+        with log.confirmacao_adiada() if log else contextlib.nullcontext():
+            self.trava.adquirir_escrita()
+            try:
+                return funcao(dados)
+            finally:
+                self.trava.liberar_escrita()
+
+    #operações
+
+    def _obter_consulta(self, dados, campo="consulta"):
+        consulta = dados.get(campo)
+        if not isinstance(consulta, str) or not consulta.strip():
+            raise ErroHTTP(400, f"campo obrigatório: {campo}")
+        return consulta
+
+    def _obter_top_k(self, dados):
+        top_k = dados.get("top_k")
+        #bool é subclasse de int; 0 significaria "sem limite" nas buscas
+        if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool) or top_k <= 0):
+            raise ErroHTTP(400, "top_k deve ser um inteiro positivo")
+        return top_k
+
+    def _obter_orcamento(self, dados, campo):
+        valor = dados.get(campo)
+        if valor is not None and (not isinstance(valor, int) or isinstance(valor, bool) or valor <= 0):
+            raise ErroHTTP(400, f"{campo} deve ser um inteiro positivo")
+        return valor
+
+    def _formatar_resultados(self, resultados, dados, consulta, booleana=False):
+        #"duplicatas": "colapsar" remove as quase duplicatas, "agrupar" lista os ids junto do primeiro
+        modo = dados.get("duplicatas")
+        termos = None
+        if dados.get("trechos"):
+            #os trechos destacam os termos da mesma consulta que foi executada
+            termos = self.motor_busca.termos_da_consulta(consulta,
+                                                         booleana, bool(dados.get("tolerante")))
+        if modo == "colapsar":
+            resultados = self.motor_busca.colapsar_duplicatas(resultados)
+        elif modo == "agrupar":
+            formatados = []
+            for resultado, duplicatas in self.motor_busca.agrupar_duplicatas(resultados):
+                item = self._formatar_resultado(resultado, termos)
+                item["duplicatas"] = duplicatas
+                formatados.append(item)
+            return {"resultados": formatados}
+        elif modo is not None:
+            raise ErroHTTP(400, "duplicatas deve ser 'colapsar' ou 'agrupar'")
+        return {"resultados": [self._formatar_resultado(resultado, termos) for resultado in resultados]}
+
+    def _formatar_resultado(self, resultado, termos=None):
+        item = {"doc_id": resultado[0], "nome": resultado[1]}
+        if len(resultado) > 2:
+            item["score"] = resultado[2]
+        if termos is not None:
+            item["trecho"] = self.motor_busca.gerar_trecho(resultado[0], termos)
+        return item
+
+    def _executar_booleana(self, dados):
+        consulta = self._obter_consulta(dados)
+        resultados = self.motor_busca.busca_booleana(consulta, bool(dados.get("tolerante")))
+        return self._formatar_resultados(resultados, dados, consulta, booleana=True)
+
+    def _executar_cosseno(self, dados):
+        consulta = self._obter_consulta(dados)
+        if dados.get("aproximada"):
+            #"aproximada": true usa os postings ordenados por impacto, com orçamento opcional
+            resultados = self.motor_busca.busca_similaridade_aproximada(
+                consulta, self._obter_top_k(dados),
+                orcamento_postings=self._obter_orcamento(dados, "orcamento_postings"),
+                max_camadas=self._obter_orcamento(dados, "max_camadas"),
+                tolerante=bool(dados.get("tolerante")))
+        else:
+            resultados = self.motor_busca.busca_similaridade_cosseno(consulta, self._obter_top_k(dados),
+                                                                     bool(dados.get("tolerante")))
+        return self._formatar_resultados(resultados, dados, consulta)
+
+    def _executar_frases(self, dados):
+        frase = self._obter_consulta(dados, "frase" if "frase" in dados else "consulta")
+        resultados = self.motor_busca.busca_por_frases(frase, self._obter_top_k(dados), bool(dados.get("tolerante")))
+        return self._formatar_resultados(resultados, dados, frase)
+
+    def _adicionar_documento(self, dados):
+        doc_id = dados["doc_id"]
+        if not isinstance(doc_id, int) or isinstance(doc_id, bool) or doc_id < 0:
+            raise ErroHTTP(400, "doc_id deve ser um inteiro não negativo")
+        if doc_id in self.gerenciador.documentos:
+            raise ErroHTTP(409, f"documento {doc_id} já existe")
+        if not self.gerenciador.adicionar_documento(doc_id, dados.get("nome", f"D{doc_id + 1}"), dados["conteudo"]):
+            return {"ignorado": doc_id, "motivo": "quase duplicata",
+                    "total_documentos": len(self.gerenciador.documentos)}
+        return {"adicionado": doc_id, "total_documentos": len(self.gerenciador.documentos)}
+
+    def _remover_documento(self, doc_id):
+        if not self.gerenciador.remover_documento(doc_id):
+            raise ErroHTTP(404, f"documento {doc_id} não encontrado")
+        return {"removido": doc_id, "total_documentos": len(self.gerenciador.documentos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de busca sobre a coleção")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--fila", type=int, default=256, help="tamanho máximo da fila de consultas")
+    parser.add_argument("--lote", type=int, default=16, help="consultas por lote")
+    parser.add_argument("--tempo-leitura", type=float, default=10.0,
+                        help="segundos para o cliente terminar de enviar uma requisição")
+    parser.add_argument("--colecao", default="colecao - trabalho 01.json")
+    parser.add_argument("--log", help="diretório do log de operações (recupera o estado ao iniciar)")
+    parser.add_argument("--log-assincrono", action="store_true",
+                        help="responde às escritas antes do fsync (pode perder até 50 ms de alterações numa queda)")
+    parser.add_argument("--ignorar-duplicatas", action="store_true",
+                        help="não indexa documentos quase duplicados de outros já na coleção")
+    args = parser.parse_args()
+
+    log = LogOperacoes(args.log, sincrono=not args.log_assincrono) if args.log else None
+    gerenciador = GerenciadorColecao(log=log, politica_duplicatas="ignorar" if args.ignorar_duplicatas else "manter")
+    if log:
+        reaplicados = log.recuperar(gerenciador)
+        print(f"✓ Estado recuperado do log ({reaplicados} operações reaplicadas)")
+
+    if not gerenciador.documentos:
+        for doc_id, doc in enumerate(gerenciador.carregar_json(args.colecao)):
+            gerenciador.adicionar_documento(doc_id, doc["name"], doc["content"])
+    print(f"✓ {len(gerenciador.documentos)} documentos indexados")
+
+    servidor = ServidorBusca(gerenciador, MotorBusca(gerenciador), args.host, args.porta,
+                             workers=args.workers, tamanho_fila=args.fila, tamanho_lote=args.lote,
+                             tempo_leitura=args.tempo_leitura)
+    try:
+        asyncio.run(servidor.servir_para_sempre())
+    except KeyboardInterrupt:
+        print("\nEncerrando o servidor...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import multiprocessing
+from gerenciador import GerenciadorColecao
+from search_engine import MotorBusca
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+
+class GerenciadorShard(GerenciadorColecao):
+    """gerenciador de uma partição da coleção
+
+    guarda só os seus documentos, mas calcula o TF-IDF com o total de documentos e as
+    doc_frequencias globais enviados pelo coordenador, para os scores baterem com os da
+    coleção inteira
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.total_docs_global = 0
+        self._tfidf_desatualizado = False
+
+    def total_documentos(self):
+        return self.total_docs_global
+
+    def _recalcular_tfidf_completo(self):
+        #o idf só fica correto depois da próxima sincronização com o coordenador
+        self._tfidf_desatualizado = True
+
+    def sincronizar(self, total_docs, doc_frequencias):
+        """aplica as doc_frequencias globais que mudaram desde a última sincronização (0 = remover)"""
+        for palavra, df in doc_frequencias.items():
+            if df > 0:
+                self.doc_frequencias[palavra] = df
+            else:
+                self.doc_frequencias.pop(palavra, None)
+
+        if doc_frequencias or total_docs != self.total_docs_global:
+            self.total_docs_global = total_docs
+            self._tfidf_desatualizado = True
+
+        if self._tfidf_desatualizado:
+            for doc_id in self.documentos:
+                self._atualizar_tfidf(doc_id)
+            self._tfidf_desatualizado = False
+
+
+def _executar_shard(conexao):
+    """laço do processo de um shard: recebe (comando, argumentos) e responde (ok, resultado)"""
+    gerenciador = GerenciadorShard()
+    motor_busca = MotorBusca(gerenciador)
+
+    while True:
+        try:
+            comando, args = conexao.recv()
+        except EOFError:
+            break
+
+        try:
+            if comando == "encerrar":
+                conexao.send((True, None))
+                break
+            elif comando == "adicionar":
+                doc_id, nome, conteudo = args
+                if doc_id in gerenciador.documentos:
+                    #o coordenador não pode contar o documento duas vezes no total e nas df
+                    resultado = None
+                else:
+                    gerenciador.adicionar_documento(doc_id, nome, conteudo)
+                    resultado = sorted(set(gerenciador.documentos[doc_id]["palavras"]))
+            elif comando == "remover":
+                if args in gerenciador.documentos:
+                    resultado = sorted(set(gerenciador.documentos[args]["palavras"]))
+                    gerenciador.remover_documento(args)
+                else:
+                    resultado = None
+            elif comando == "estatisticas":
+                resultado = (len(gerenciador.documentos),
+                             sum(len(doc["palavras"]) for doc in gerenciador.documentos.values()))
+            else:
+                sincronizacao, consulta, top_k = args
+                gerenciador.sincronizar(*sincronizacao)
+
+                if comando == "booleana":
+                    resultado = motor_busca.busca_booleana(consulta)
+                elif comando in ("cosseno", "frases"):
+                    if comando == "cosseno":
+                        resultado = motor_busca.busca_similaridade_cosseno(consulta)
+                    else:
+                        resultado = motor_busca.busca_por_frases(consulta)
+                    #mesmo desempate do coordenador, senão o corte do shard dependeria da ordem de inserção
+                    resultado.sort(key=lambda x: (-x[2], x[0]))
+                    if top_k:
+                        resultado = resultado[:top_k]
+                else:
+                    raise ValueError(f"comando desconhecido: {comando}")
+
+            conexao.send((True, resultado))
+        except Exception as e:
+            conexao.send((False, f"{type(e).__name__}: {e}"))
+
+    conexao.close()
+
+
+class ColecaoDistribuida:
+    """coordena uma coleção particionada por documento entre vários processos
+
+    adições e remoções vão só para o shard dono do doc_id (doc_id % num_shards), enquanto as
+    consultas são enviadas a todos os shards e os top-k parciais são combinados. O coordenador
+    mantém as doc_frequencias globais e as repassa aos shards antes de cada consulta.
+    """
+
+    def __init__(self, num_shards=4):
+        self.num_shards = num_shards
+        self.doc_frequencias = {}
+        self.vocabulario = set()
+        self.total_docs = 0
+
+        #palavras cuja df global mudou desde a última sincronização de cada shard
+        self._pendentes = [set() for _ in range(num_shards)]
+
+        self._conexoes = []
+        self._processos = []
+        for _ in range(num_shards):
+            conexao_local, conexao_shard = multiprocessing.Pipe()
+            processo = multiprocessing.Process(target=_executar_shard, args=(conexao_shard,), daemon=True)
+            processo.start()
+            conexao_shard.close()
+            self._conexoes.append(conexao_local)
+            self._processos.append(processo)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def encerrar(self):
+        for conexao, processo in zip(self._conexoes, self._processos):
+            try:
+                conexao.send(("encerrar", None))
+                conexao.recv()
+            except (EOFError, OSError):
+                pass
+            conexao.close()
+            processo.join()
+        self._conexoes = []
+        self._processos = []
+
+    #comunicação com os shards
+
+    def _receber(self, conexao):
+        ok, resultado = conexao.recv()
+        if not ok:
+            raise RuntimeError(f"Erro no shard: {resultado}")
+        return resultado
+
+    def _receber_todos(self):
+        #lê a resposta de todos os shards antes de acusar erro; uma resposta deixada no pipe
+        #seria lida como resposta do pedido seguinte
+        return [conexao.recv() for conexao in self._conexoes]
+
+    def _resultados(self, respostas):
+        for ok, resultado in respostas:
+            if not ok:
+                raise RuntimeError(f"Erro no shard: {resultado}")
+        return [resultado for _, resultado in respostas]
+
+    def _enviar_para(self, shard, comando, args):
+        conexao = self._conexoes[shard]
+        conexao.send((comando, args))
+        return self._receber(conexao)
+
+    def _difundir(self, comando, consulta, top_k=None):
+        #envia para todos antes de esperar, assim os shards trabalham em paralelo
+        enviadas = []
+        for shard, conexao in enumerate(self._conexoes):
+            sincronizacao = self._sincronizacao(shard)
+            enviadas.append(sincronizacao[1])
+            conexao.send((comando, (sincronizacao, consulta, top_k)))
+
+        respostas = self._receber_todos()
+        for shard, (ok, _) in enumerate(respostas):
+            #a df só sai das pendentes depois que o shard respondeu; se falhou, vai de novo no próximo pedido
+            if ok:
+                self._pendentes[shard].difference_update(enviadas[shard])
+        return self._resultados(respostas)
+
+    def _sincronizacao(self, shard):
+        alteradas = {palavra: self.doc_frequencias.get(palavra, 0) for palavra in self._pendentes[shard]}
+        return self.total_docs, alteradas
+
+    def _shard_do_documento(self, doc_id):
+        return doc_id % self.num_shards
+
+    #atualização da coleção
+
+    def adicionar_documento(self, doc_id, nome, conteudo):
+        palavras = self._enviar_para(self._shard_do_documento(doc_id), "adicionar", (doc_id, nome, conteudo))
+        if palavras is None:
+            print(f"Documento {doc_id} já existe")
+            return False
+
+        self.total_docs += 1
+        for palavra in palavras:
+            self.doc_frequencias[palavra] = self.doc_frequencias.get(palavra, 0) + 1
+        self.vocabulario.update(palavras)
+        for pendentes in self._pendentes:
+            pendentes.update(palavras)
+        return True
+
+    def remover_documento(self, doc_id):
+        palavras = self._enviar_para(self._shard_do_documento(doc_id), "remover", doc_id)
+        if palavras is None:
+            print(f"Documento {doc_id} não encontrado")
+            return False
+
+        self.total_docs -= 1
+        for palavra in palavras:
+            self.doc_frequencias[palavra] -= 1
+            if self.doc_frequencias[palavra] <= 0:
+                del self.doc_frequencias[palavra]
+                self.vocabulario.discard(palavra)
+        for pendentes in self._pendentes:
+            pendentes.update(palavras)
+        return True
+
+    #consultas
+
+    def _combinar_ranqueamento(self, parciais, top_k):
+        resultados = [item for parcial in parciais for item in parcial]
+        resultados.sort(key=lambda x: (-x[2], x[0]))
+        if top_k:
+            resultados = resultados[:top_k]
+        return resultados
+
+    def busca_booleana(self, consulta):
+        parciais = self._difundir("booleana", consulta)
+        return sorted(item for parcial in parciais for item in parcial)
+
+    def busca_similaridade_cosseno(self, consulta, top_k=None):
+        return self._combinar_ranqueamento(self._difundir("cosseno", consulta, top_k), top_k)
+
+    def busca_por_frases(self, frase, top_k=None):
+        return self._combinar_ranqueamento(self._difundir("frases", frase, top_k), top_k)
+
+    def obter_estatisticas(self):
+        total_docs = 0
+        total_palavras = 0
+        for conexao in self._conexoes:
+            conexao.send(("estatisticas", None))
+        for docs, palavras in self._resultados(self._receber_todos()):
+            total_docs += docs
+            total_palavras += palavras
+
+        return {
+            "total_documentos": total_docs,
+            "total_palavras_unicas": len(self.vocabulario),
+            "total_palavras": total_palavras,
+            "media_palavras_por_doc": total_palavras / total_docs if total_docs > 0 else 0
+        }
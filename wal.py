@@ -0,0 +1,278 @@
+import contextlib
+import json
+import os
+import threading
+
+# Ana Alice Cordeiro - 12211BCC028;
+# Bruno Castro - 12211BCC004;
+# Ester Freitas - 12211BCC036;
+# Fernanda Ferreira - 12211BCC043;
+# João Vitor Feijó - 12311BCC061
+
+ARQUIVO_LOG = "operacoes.log"
+ARQUIVO_CHECKPOINT = "checkpoint.json"
+
+
+def _fsync_diretorio(diretorio):
+    #garante que o os.replace do checkpoint sobreviva a uma queda de energia
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class LogOperacoes:
+    """log de escrita antecipada (write-ahead log) das alterações do GerenciadorColecao
+
+    cada adição/remoção vira uma linha JSON com número de sequência (lsn). Com
+    `sincrono=True` (padrão) a alteração só é confirmada depois do fsync do seu registro: o
+    primeiro escritor que precisa esperar grava tudo o que está pendente com um único
+    write + fsync e os que chegam durante esse fsync entram no próximo grupo (group commit).
+    Com `sincrono=False` a confirmação é assíncrona: o registro fica pendente até o grupo
+    chegar a `tamanho_grupo` registros ou até a thread de gravação agir (a cada
+    `intervalo_grupo` segundos), então uma queda pode perder as alterações confirmadas nesse
+    intervalo. A cada `checkpoint_a_cada` registros o estado inteiro é salvo e o log é
+    zerado, e a recuperação só reaplica o que veio depois do último checkpoint.
+
+    as alterações do gerenciador devem ser serializadas por quem o usa (o servidor usa uma
+    trava de escrita); só a espera pelo fsync pode acontecer em paralelo.
+    """
+
+    def __init__(self, diretorio, tamanho_grupo=64, intervalo_grupo=0.05, checkpoint_a_cada=1000, sincrono=True):
+        self.diretorio = diretorio
+        self.tamanho_grupo = tamanho_grupo
+        self.intervalo_grupo = intervalo_grupo
+        self.checkpoint_a_cada = checkpoint_a_cada
+        self.sincrono = sincrono
+
+        self.caminho_log = os.path.join(diretorio, ARQUIVO_LOG)
+        self.caminho_checkpoint = os.path.join(diretorio, ARQUIVO_CHECKPOINT)
+
+        os.makedirs(diretorio, exist_ok=True)
+        self._arquivo = None
+        self._pendentes = []
+        self.proximo_lsn = 1
+        self.registros_desde_checkpoint = 0
+
+        self._condicao = threading.Condition()
+        self._lsn_duravel = 0
+        self._gravando = False
+        self._local = threading.local()
+
+        #grava periodicamente o que estiver pendente, mesmo sem novas escritas
+        self._parado = threading.Event()
+        self._thread_gravacao = threading.Thread(target=self._gravar_periodicamente, daemon=True)
+        self._thread_gravacao.start()
+
+    #escrita
+
+    def _abrir(self):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho_log, 'a', encoding='utf-8')
+
+    def _registrar(self, registro):
+        with self._condicao:
+            registro["lsn"] = self.proximo_lsn
+            self.proximo_lsn += 1
+            self.registros_desde_checkpoint += 1
+            self._pendentes.append(json.dumps(registro, ensure_ascii=False))
+            grupo_cheio = len(self._pendentes) >= self.tamanho_grupo
+
+        if grupo_cheio and not self.sincrono:
+            self.sincronizar()
+        return registro["lsn"]
+
+    def registrar_adicao(self, doc_id, nome, conteudo, palavras, assinatura=None, offsets=None):
+        """registra a adição e retorna o lsn, que deve ser passado a confirmar() depois de aplicada"""
+        return self._registrar({"op": "adicionar", "doc_id": doc_id, "nome": nome, "conteudo": conteudo,
+                                "palavras": palavras, "assinatura": assinatura, "offsets": offsets})
+
+    def registrar_remocao(self, doc_id):
+        return self._registrar({"op": "remover", "doc_id": doc_id})
+
+    def confirmar(self, lsn):
+        """no modo síncrono, espera o registro `lsn` estar no disco (ou adia a espera, ver confirmacao_adiada)"""
+        if not self.sincrono:
+            return
+        adiados = getattr(self._local, "adiados", None)
+        if adiados is not None:
+            adiados.append(lsn)
+            return
+        self._gravar_ate(lsn)
+
+    @contextlib.contextmanager
+    def confirmacao_adiada(self):
+        """as confirmações feitas dentro do bloco só esperam o fsync na saída dele; permite
+        soltar uma trava de escrita antes de esperar, para outros escritores entrarem no mesmo grupo
+        """
+        self._local.adiados = []
+        try:
+            yield
+        finally:
+            adiados = self._local.adiados
+            self._local.adiados = None
+            if adiados:
+                self._gravar_ate(max(adiados))
+
+    def _gravar_ate(self, lsn):
+        with self._condicao:
+            while self._lsn_duravel < lsn:
+                if self._gravando:
+                    #outro escritor está gravando; espera e confere de novo
+                    self._condicao.wait()
+                    continue
+
+                #este escritor grava o grupo inteiro pendente
+                grupo = self._pendentes
+                ultimo = self.proximo_lsn - 1
+                self._pendentes = []
+                self._gravando = True
+                self._condicao.release()
+                gravado = False
+                try:
+                    if grupo:
+                        self._abrir()
+                        self._arquivo.write("\n".join(grupo) + "\n")
+                        self._arquivo.flush()
+                        os.fsync(self._arquivo.fileno())
+                    gravado = True
+                finally:
+                    self._condicao.acquire()
+                    self._gravando = False
+                    if gravado:
+                        self._lsn_duravel = max(self._lsn_duravel, ultimo)
+                    else:
+                        #o grupo volta para a fila e o erro chega a quem estava gravando
+                        self._pendentes = grupo + self._pendentes
+                    self._condicao.notify_all()
+
+    def sincronizar(self):
+        """grava todos os registros pendentes com um único write + fsync"""
+        with self._condicao:
+            ultimo = self.proximo_lsn - 1
+        self._gravar_ate(ultimo)
+
+    def _gravar_periodicamente(self):
+        while not self._parado.wait(self.intervalo_grupo):
+            try:
+                self.sincronizar()
+            except OSError:
+                #tenta de novo no próximo ciclo; a escrita síncrona devolve o erro ao escritor
+                pass
+
+    def fechar(self):
+        self._parado.set()
+        self._thread_gravacao.join()
+        self.sincronizar()
+        with self._condicao:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+
+    #checkpoint
+
+    def precisa_checkpoint(self):
+        return self.checkpoint_a_cada and self.registros_desde_checkpoint >= self.checkpoint_a_cada
+
+    def checkpoint(self, gerenciador):
+        """salva o estado completo e descarta o log que ele já cobre"""
+        self.sincronizar()
+        lsn = self.proximo_lsn - 1
+
+        temporario = self.caminho_checkpoint + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({
+                "lsn": lsn,
+                "documentos": [gerenciador._estado_documento(doc_id) for doc_id in gerenciador.documentos]
+            }, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho_checkpoint)
+        _fsync_diretorio(self.diretorio)
+
+        #se cair aqui, a recuperação ignora os registros com lsn <= lsn do checkpoint
+        with self._condicao:
+            while self._gravando:
+                self._condicao.wait()
+            if self._arquivo is not None:
+                self._arquivo.close()
+            self._arquivo = open(self.caminho_log, 'w', encoding='utf-8')
+            os.fsync(self._arquivo.fileno())
+            self.registros_desde_checkpoint = 0
+
+    #recuperação
+
+    def _ler_registros(self):
+        """gera (registro, posição do fim da linha) para cada linha íntegra do log"""
+        try:
+            f = open(self.caminho_log, 'rb')
+        except FileNotFoundError:
+            return
+
+        with f:
+            fim = 0
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    #última linha cortada pela queda, nunca foi confirmada
+                    break
+                try:
+                    registro = json.loads(linha.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                fim += len(linha)
+                yield registro, fim
+
+    def recuperar(self, gerenciador):
+        """reconstrói o gerenciador a partir do último checkpoint e do final do log
+        retorna: número de registros do log reaplicados
+        """
+        log_original = gerenciador.log
+        gerenciador.log = None
+
+        lsn_checkpoint = 0
+        try:
+            with open(self.caminho_checkpoint, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+            lsn_checkpoint = estado["lsn"]
+            for doc in estado["documentos"]:
+                gerenciador._restaurar_documento(doc)
+        except FileNotFoundError:
+            pass
+
+        ultimo_lsn = lsn_checkpoint
+        reaplicados = 0
+        fim_valido = 0
+        for registro, fim_valido in self._ler_registros():
+            if registro["lsn"] <= lsn_checkpoint:
+                continue
+
+            doc_id = registro["doc_id"]
+            if registro["op"] == "adicionar":
+                gerenciador._restaurar_documento(registro)
+            elif registro["op"] == "remover" and doc_id in gerenciador.documentos:
+                gerenciador._desindexar_documento(doc_id)
+
+            ultimo_lsn = registro["lsn"]
+            reaplicados += 1
+
+        #descarta o pedaço corrompido para que os próximos registros não fiquem atrás dele
+        if os.path.exists(self.caminho_log) and os.path.getsize(self.caminho_log) > fim_valido:
+            with open(self.caminho_log, 'r+b') as f:
+                f.truncate(fim_valido)
+                os.fsync(f.fileno())
+
+        #o TF-IDF é recalculado uma vez só, no fim
+        gerenciador._recalcular_tfidf_completo()
+        gerenciador.log = log_original
+
+        with self._condicao:
+            self.proximo_lsn = ultimo_lsn + 1
+            self._lsn_duravel = ultimo_lsn
+            self.registros_desde_checkpoint = reaplicados
+        return reaplicados